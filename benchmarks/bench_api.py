@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from flowchart import load_flowchart
+
+from .load_test import APP
+
+# throughput of walking the flowchart through the JSON API of flowchart/api.py, against clicking
+# through the Streamlit app. simulated users take random answers: over the API every answer is one
+# GET /node/{id} on a kept-alive connection (and some users send their whole walk as one POST /walk),
+# in the app it is one button click and script rerun of a headless AppTest session - which leaves out
+# the websocket and the browser, so the real Streamlit path is slower still.
+# the API server runs in its own process.
+# run as
+#   python -m benchmarks.bench_api [--users N] [--clicks N]
+
+
+def percentiles(latencies):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return cuts[49], cuts[98]
+
+
+async def request(reader, writer, method, path, body=b''):
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = int(head.split(b'Content-Length: ', 1)[1].split(b'\r\n', 1)[0])
+    return json.loads(await reader.readexactly(length))
+
+
+# one user: random answers from the start node, one request each, on one connection
+async def api_user(host, port, seed, clicks, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    node = await request(reader, writer, 'GET', '/node/0')
+    for _ in range(clicks):
+        start = time.perf_counter()
+        node = await request(reader, writer, 'GET', f"/node/{rng.choice(node['edges'])['next']}")
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+# one user sending whole walks of clicks answers at a time
+async def walk_user(host, port, chart, seed, clicks, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    for _ in range(clicks):
+        node, replies = 0, []
+        for _ in range(clicks):
+            reply, node = rng.choice(chart.out_edges(node))
+            replies.append(reply)
+        start = time.perf_counter()
+        await request(reader, writer, 'POST', '/walk', json.dumps(replies).encode())
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_users(make_user, users):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(make_user(seed, latencies) for seed in range(users)))
+    return latencies, time.perf_counter() - start
+
+
+def streamlit_clicks(clicks):
+    AppTest.from_file(APP, default_timeout=30).run()
+    session = AppTest.from_file(APP, default_timeout=30).run()
+    rng = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(clicks):
+        button = rng.choice(session.button)
+        began = time.perf_counter()
+        button.click().run()
+        latencies.append(time.perf_counter() - began)
+    return latencies, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the JSON API against the Streamlit app.')
+    parser.add_argument('--users', type=int, default=20, help='concurrent users of the API')
+    parser.add_argument('--clicks', type=int, default=200, help='answers per user')
+    args = parser.parse_args(argv)
+
+    server = subprocess.Popen([sys.executable, '-m', 'flowchart.api', '--port', '0'], stdout=subprocess.PIPE, text=True)
+    try:
+        host, port = server.stdout.readline().rsplit('//', 1)[1].strip().split(':')
+        chart = load_flowchart()
+        results = {
+            'GET /node/{id}': asyncio.run(run_users(
+                lambda seed, latencies: api_user(host, port, seed, args.clicks, latencies), args.users)),
+            'POST /walk': asyncio.run(run_users(
+                lambda seed, latencies: walk_user(host, port, chart, seed, args.clicks // 10, latencies), args.users)),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+    results['Streamlit rerun'] = streamlit_clicks(max(20, args.clicks // 10))
+
+    print(f'{args.users} users over the API, one session in the app')
+    print(f"{'':16} {'requests':>9} {'per s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, (latencies, seconds) in results.items():
+        p50, p99 = percentiles(latencies)
+        print(f'{name:16} {len(latencies):9} {len(latencies) / seconds:9.0f} {p50 * 1e3:8.2f} {p99 * 1e3:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from flowchart import eventlog, load_flowchart
+
+# the cost of logging a click with the event log of flowchart/eventlog.py - into the ring buffer, which
+# a background thread writes out in batches - against writing every click to the file straight away,
+# with and without fsync. then the time and memory the report takes on a large log of random walks.
+# run as
+#   python -m benchmarks.bench_eventlog [--events N] [--records N]
+
+
+def per_event(log, events):
+    session = eventlog.session_id()
+    start = time.perf_counter()
+    for i in range(events):
+        log(session, eventlog.ANSWER, i % 45, (i + 1) % 45)
+    return (time.perf_counter() - start) / events
+
+
+def synchronous(fd, sync):
+    def log(session, kind, source, target):
+        os.write(fd, eventlog.frame(eventlog.RECORD.pack(session, kind, source, target, time.time())))
+        if sync:
+            os.fsync(fd)
+    return log
+
+
+# a log of random walks through the flowchart, written in batches like the app does
+def write_walks(path, records, seed=0):
+    chart = load_flowchart()
+    rng = random.Random(seed)
+    fd = eventlog.open_log(path)
+    batch = []
+    session, node = None, 0
+    for _ in range(records):
+        if session is None or rng.random() < 0.05:
+            session, node = eventlog.session_id(), 0
+            batch.append(eventlog.RECORD.pack(session, eventlog.START, 0, 0, time.time()))
+            continue
+        _, target = rng.choice(chart.out_edges(node))
+        batch.append(eventlog.RECORD.pack(session, eventlog.ANSWER, node, target, time.time()))
+        node = target
+        if len(batch) == 65536:
+            os.write(fd, eventlog.frame(b''.join(batch)))
+            batch = []
+    os.write(fd, eventlog.frame(b''.join(batch)))
+    os.close(fd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the event log.')
+    parser.add_argument('--events', type=int, default=20_000, help='clicks logged per way of logging')
+    parser.add_argument('--records', type=int, default=2_000_000, help='records in the log for the report')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        eventlog.PATH = os.path.join(directory, 'buffered.log')
+        eventlog.ENABLED = True
+        fd = eventlog.open_log(os.path.join(directory, 'synchronous.log'))
+        print(f"{'per click':28} {'us':>8}")
+        for name, log, events in (('ring buffer', eventlog.record, args.events),
+                                  ('write', synchronous(fd, False), args.events),
+                                  ('write and fsync', synchronous(fd, True), max(1, args.events // 20))):
+            print(f'{name:28} {per_event(log, events) * 1e6:8.2f}')
+        os.close(fd)
+
+        path = os.path.join(directory, 'walks.log')
+        write_walks(path, args.records)
+        start = time.perf_counter()
+        counts = eventlog.report(path)
+        seconds = time.perf_counter() - start
+        # again for the memory, which tracing slows down
+        tracemalloc.start()
+        eventlog.report(path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"\nreport on {counts['records']} records ({os.path.getsize(path) / 1e6:.0f} MB, "
+              f"{counts['sessions']} sessions): {seconds:.2f} s, "
+              f"{counts['records'] / seconds / 1e6:.1f} M records/s, peak memory {peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import math
+import time
+
+import numpy as np
+import sympy as sp
+
+from flowchart.classify import x, y
+from methods import graphical
+
+# time the direction field of one ODE while the view pans and zooms: evaluating the right-hand side
+# point by point in Python, evaluating the whole grid of every view in one vectorised call, and the
+# tile cache of methods/graphical.py, which only evaluates the tiles that come into view
+# run as
+#   python -m benchmarks.bench_graphical [--views N]
+
+# a right-hand side of the size students type in, and one of textbook length
+EQUATIONS = {
+    'short': sp.sin(x * y) - y ** 2 / (1 + x ** 2),
+    'long': sum(sp.sin(k * x + y) * sp.exp(-k * y ** 2) / (k + x ** 2) for k in range(1, 9)),
+}
+
+
+# a walk of the view: pan right, zoom in, pan up, zoom back out
+def views(count):
+    for n in range(count):
+        phase = n / count
+        zoom = 1 + 3 * math.sin(math.pi * phase) ** 2
+        cx, cy = 20 * phase, 5 * math.sin(2 * math.pi * phase)
+        yield (cx - 5 / zoom, cx + 5 / zoom, cy - 5 / zoom, cy + 5 / zoom)
+
+
+# the grid of points of a view, as the tiles would give it
+def grid(viewport, resolution):
+    points = [graphical._points(tile, resolution) for tile in graphical.tiles(viewport)]
+    return np.concatenate([p[0] for p in points]), np.concatenate([p[1] for p in points])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the cached, vectorised direction field.')
+    parser.add_argument('--views', type=int, default=200)
+    parser.add_argument('--resolution', type=int, default=graphical.RESOLUTION, help='arrows along a tile')
+    args = parser.parse_args(argv)
+    walk = list(views(args.views))
+    grids = [grid(viewport, args.resolution) for viewport in walk]
+    points = sum(len(xs) for xs, _ in grids)
+    print(f'{args.views} views, {points / args.views:.0f} points per view, milliseconds per view')
+    print(f"{'':8} {'loop':>8} {'vectorised':>11} {'tiles':>8} {'again':>8}")
+
+    for name, expression in EQUATIONS.items():
+        F_scalar = sp.lambdify((x, y), expression, 'math')
+        F = sp.lambdify((x, y), expression, 'numpy')
+
+        start = time.perf_counter()
+        for xs, ys in grids:
+            [F_scalar(a, b) for a, b in zip(xs.tolist(), ys.tolist())]
+        looped = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for xs, ys in grids:
+            F(xs, ys)
+        vectorised = time.perf_counter() - start
+
+        # the tile cache from cold, and walked again with every tile cached
+        graphical.clear_cache()
+        function = graphical.slope_field(F)
+        times = []
+        for _ in range(2):
+            start = time.perf_counter()
+            for viewport in walk:
+                graphical.field(name, function, viewport, args.resolution)
+            times.append(time.perf_counter() - start)
+
+        print(f'{name:8}', *(f'{seconds / args.views * 1e3:{width}.3f}'
+                             for seconds, width in zip((looped, vectorised, *times), (8, 11, 8, 8))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import gc
+import timeit
+import tracemalloc
+
+from flowchart.export import to_networkx
+from flowchart.compiler import compile_flowchart
+
+# compare the render-time lookups of draw_buttons (node label + outgoing edges) between the
+# networkx graph and the compiled flowchart, and the memory each of them keeps alive
+# run as
+#   python -m benchmarks.bench_lookup
+
+
+def networkx_lookup(G, node):
+    label = G.nodes[node]['label']
+    out_edges = G.out_edges(node, data=True)
+    return label, {edge_data['label']: tail for head, tail, edge_data in out_edges}
+
+
+def compiled_lookup(chart, node):
+    return chart.label(node), chart.out_edges(node)
+
+
+def time_per_lookup(lookup, graph, nodes, repeat=5, number=2000):
+    def run():
+        for node in nodes:
+            lookup(graph, node)
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(nodes))
+
+
+def retained_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+# peak of the memory allocated while looking up every node once (temporaries included)
+def transient_allocations(lookup, graph, nodes):
+    lookup(graph, nodes[0])
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for node in nodes:
+        lookup(graph, node)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - baseline
+
+
+def main():
+    # the compiled flowchart is measured with its labels still encoded; building the networkx graph
+    # decodes them, so the decoded label strings count towards networkx
+    chart, chart_bytes = retained_memory(compile_flowchart)
+    G, graph_bytes = retained_memory(lambda: to_networkx(chart))
+    nodes = list(range(len(chart)))
+
+    results = [
+        ('networkx', time_per_lookup(networkx_lookup, G, nodes), graph_bytes),
+        ('compiled', time_per_lookup(compiled_lookup, chart, nodes), chart_bytes),
+    ]
+    print(f'{len(nodes)} nodes, {chart.num_edges()} edges')
+    print(f"{'':10} {'ns/lookup':>10} {'retained KiB':>13}")
+    for name, seconds, size in results:
+        print(f'{name:10} {seconds * 1e9:10.0f} {size / 1024:13.1f}')
+    print(f'speedup: {results[0][1] / results[1][1]:.1f}x')
+    print(f'peak bytes allocated by one pass over all nodes: networkx {transient_allocations(networkx_lookup, G, nodes)}, '
+          f'compiled {transient_allocations(compiled_lookup, chart, nodes)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import numpy as np
+
+from methods.numerical import DONE, scalar_system, solve, stream
+
+# time a fan of solutions of one ODE: the whole batch in one solve, against one solve per initial
+# condition (which is what looping a scalar solver over them amounts to), and the whole batch streamed
+# in chunks, with how long the first chunk takes to come out
+# run as
+#   python -m benchmarks.bench_numerical [--trajectories N]
+
+PROBLEMS = {
+    # smooth and easy
+    "y' = -2 x y": (lambda x, y: -2 * x * y, (0, 3)),
+    # the steps vary a lot between trajectories
+    "y' = sin(x y)": (lambda x, y: np.sin(x * y), (0, 10)),
+    # some trajectories blow up and fail
+    "y' = y^2 - x": (lambda x, y: y * y - x, (0, 4)),
+}
+
+
+def best_of(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the batched Runge-Kutta engine.')
+    parser.add_argument('--trajectories', type=int, default=200)
+    parser.add_argument('--outputs', type=int, default=201, help='output times per trajectory')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    y0 = np.linspace(-2, 2, args.trajectories)[:, None]
+    print(f'{args.trajectories} trajectories, {args.outputs} output times each')
+    print(f"{'':16} {'batched ms':>11} {'looped ms':>10} {'speedup':>8} {'steps':>7} {'done':>5} "
+          f"{'streamed ms':>12} {'first chunk ms':>15}")
+    for name, (F, t_span) in PROBLEMS.items():
+        f = scalar_system(F)
+        t_eval = np.linspace(*t_span, args.outputs)
+        batched, solution = best_of(lambda: solve(f, t_span, y0, t_eval), args.repeat)
+        looped, _ = best_of(lambda: [solve(f, t_span, row[None], t_eval) for row in y0], args.repeat)
+        streamed, _ = best_of(lambda: [chunk.sample(t_eval) for chunk in stream(f, t_span, y0)], args.repeat)
+        first, _ = best_of(lambda: next(stream(f, t_span, y0)).sample(t_eval), args.repeat)
+        print(f'{name:16} {batched * 1e3:11.1f} {looped * 1e3:10.1f} {looped / batched:7.1f}x '
+              f'{int(solution.steps.sum()):7} {int((solution.status == DONE).sum()):5} '
+              f'{streamed * 1e3:12.1f} {first * 1e3:15.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import random
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from flowchart import prefetch
+
+from .load_test import APP, navigation
+
+# what prefetching the next labels (see flowchart/prefetch.py) costs and how often it can help. the
+# same random clicks are made in a headless AppTest session with and without it, and for every click
+# it records the rerun time, the bytes of the prefetch element sent with the node, and whether the
+# clicked button's target was among the prefetched labels (a hit, which the browser can show without
+# waiting for the rerun).
+# how long the browser takes to show a hit is not measured here - there is no browser. in a browser,
+# window.odeClickTimings has the measured times from each click to the preview and to the rerun's content.
+# run as
+#   python -m benchmarks.bench_prefetch [--clicks N]
+
+
+def clicks(enabled, count, seed):
+    prefetch.ENABLED = enabled
+    session = AppTest.from_file(APP, default_timeout=30).run()
+    rng = random.Random(seed)
+    latencies, hits, sizes = [], [], []
+    for _ in range(count):
+        button = rng.choice(navigation(session))
+        hits.append(f'data-key="{button.key}"' in element(session))
+        start = time.perf_counter()
+        button.click().run()
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(element(session).encode()))
+    return latencies, hits, sizes
+
+
+def element(session):
+    return next(html.proto.body for html in session.get('html') if 'ode-prefetch' in html.proto.body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the cost of prefetching and how many clicks it covers.')
+    parser.add_argument('--clicks', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # load the flowchart and warm up the caches
+    clicks(True, 20, args.seed + 1)
+    print(f'{args.clicks} random clicks')
+    print(f"{'':12} {'rerun p50 ms':>13} {'p95 ms':>7} {'bytes/node':>11} {'hits':>6}")
+    for name, enabled in (('no prefetch', False), ('prefetch', True)):
+        latencies, hits, sizes = clicks(enabled, args.clicks, args.seed)
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        print(f'{name:12} {cuts[49] * 1e3:13.1f} {cuts[94] * 1e3:7.1f} {statistics.mean(sizes):11.0f} '
+              f'{sum(hits) / len(hits):6.0%}')
+    print('hits are the clicks whose next label was prefetched; the browser shows those without waiting for the rerun')
+
+
+if __name__ == '__main__':
+    main()
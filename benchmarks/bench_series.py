@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import sympy as sp
+
+from flowchart.classify import x, y
+from methods import series
+
+# time the power series engine: asking for all coefficients of the solution in one go, asking for
+# more and more of them from the memoised series, as the app's slider does, and the same without
+# memoisation
+# run as
+#   python -m benchmarks.bench_series [--order N]
+
+PROBLEMS = {
+    "y' = y^2 + x^2": (x ** 2 + y ** 2, 0, 0),
+    "y' = sin(x y) + y^2/(1+x^2)": (sp.sin(x * y) + y ** 2 / (1 + x ** 2), 0, 0.3),
+    "y' = exp(-y) cos(x)": (sp.exp(-y) * sp.cos(x), 0, 0.5),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the power series engine.')
+    parser.add_argument('--order', type=int, default=1000)
+    parser.add_argument('--step', type=int, default=10, help='orders added per request when extending')
+    args = parser.parse_args(argv)
+
+    print(f'{args.order} coefficients')
+    print(f"{'':30} {'one go ms':>11} {'extended ms':>12} {'fresh each ms':>14}")
+    for name, (F, x0, y0) in PROBLEMS.items():
+        start = time.perf_counter()
+        series.Series(F, x0, y0).coefficients(args.order)
+        once = time.perf_counter() - start
+
+        memoised = series.Series(F, x0, y0)
+        start = time.perf_counter()
+        for n in range(args.step, args.order + 1, args.step):
+            memoised.coefficients(n)
+        extended = time.perf_counter() - start
+
+        # what asking again would cost without memoisation
+        start = time.perf_counter()
+        for n in range(args.step, args.order + 1, args.step):
+            series.Series(F, x0, y0).coefficients(n)
+        fresh = time.perf_counter() - start
+        print(f'{name:30} {once * 1e3:11.1f} {extended * 1e3:12.1f} {fresh * 1e3:14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# cold-start cost of getting the flowchart into memory, measured in fresh interpreters with -X importtime
+# run as
+#   python -m benchmarks.bench_startup [--repeat N] [--json results.json]
+# 'precompiled' is what the app does; 'source' is the fallback when the cache is missing or stale;
+# 'networkx' is the import the app used to pay for on top of that
+
+SCENARIOS = {
+    'precompiled': 'import flowchart; flowchart.load_flowchart()',
+    'source': 'import flowchart; flowchart.load_flowchart(path="")',
+    'networkx': 'import networkx.drawing.nx_agraph',
+}
+
+
+# total import time in microseconds, i.e. the sum of the cumulative times of all top-level imports
+def import_time(stderr):
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return total
+
+
+def measure(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    return import_time(result.stderr) / 1000, wall * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold-start time of loading the flowchart.')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    # 'baseline' is an interpreter that imports nothing, so that its own startup can be subtracted.
+    # scenarios are interleaved and the fastest run is kept, which is the least noisy estimate
+    scenarios = {'baseline': 'pass', **SCENARIOS}
+    runs = {name: [] for name in scenarios}
+    for _ in range(args.repeat):
+        for name, code in scenarios.items():
+            runs[name].append(measure(code))
+    baseline_imports = min(run[0] for run in runs['baseline'])
+    baseline_wall = min(run[1] for run in runs['baseline'])
+
+    results = {}
+    print(f"{'':12} {'import ms':>10} {'wall ms':>10}")
+    for name in SCENARIOS:
+        imports = min(run[0] for run in runs[name]) - baseline_imports
+        wall = min(run[1] for run in runs[name]) - baseline_wall
+        results[name] = {'import_ms': imports, 'wall_ms': wall}
+        print(f'{name:12} {imports:10.1f} {wall:10.1f}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version, 'repeat': args.repeat, 'results': results}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
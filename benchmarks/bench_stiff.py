@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import numpy as np
+import sympy as sp
+
+from methods import numerical, stiff
+from methods.expressions import system_functions
+
+# compare the implicit BDF engine with the explicit Runge-Kutta engine on classic stiff problems:
+# steps, right-hand side evaluations, Jacobians, LU factorisations and wall time. the BDF engine runs
+# with the Jacobian derived symbolically and with finite differences.
+# run as
+#   python -m benchmarks.bench_stiff [--max-steps N]
+# the explicit engine gives up after --max-steps steps, which on the stiffer problems it will.
+
+t = sp.Symbol('t')
+y1, y2, y3 = sp.symbols('y1 y2 y3')
+
+
+def van_der_pol(mu):
+    return [y2, mu * (1 - y1 ** 2) * y2 - y1], [y1, y2], [2, 0], (0, 2 * mu)
+
+
+PROBLEMS = {
+    'Robertson, t <= 40': ([-0.04 * y1 + 1e4 * y2 * y3, 0.04 * y1 - 1e4 * y2 * y3 - 3e7 * y2 ** 2, 3e7 * y2 ** 2],
+                           [y1, y2, y3], [1, 0, 0], (0, 40)),
+    'Robertson, t <= 4e5': ([-0.04 * y1 + 1e4 * y2 * y3, 0.04 * y1 - 1e4 * y2 * y3 - 3e7 * y2 ** 2, 3e7 * y2 ** 2],
+                            [y1, y2, y3], [1, 0, 0], (0, 4e5)),
+    'Van der Pol, mu = 10': van_der_pol(10),
+    'Van der Pol, mu = 1000': van_der_pol(1000),
+}
+
+
+def run(name, solver):
+    start = time.perf_counter()
+    solution = solver()
+    seconds = time.perf_counter() - start
+    done = 'done' if (solution.status == numerical.DONE).all() else 'gave up'
+    print(f'  {name:24} {int(solution.steps[0]):8} {solution.evaluations:8} {solution.jacobians:6} '
+          f'{solution.factorisations:6} {seconds * 1e3:10.1f} {done:>8}')
+    return solution
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the stiff solver against the explicit one.')
+    parser.add_argument('--max-steps', type=int, default=20_000, help='step limit for the explicit engine')
+    parser.add_argument('--rtol', type=float, default=1e-6)
+    parser.add_argument('--atol', type=float, default=1e-10)
+    args = parser.parse_args(argv)
+    tolerances = {'rtol': args.rtol, 'atol': args.atol}
+
+    for problem, (exprs, variables, y0, t_span) in PROBLEMS.items():
+        f, jac = system_functions(exprs, t, variables)
+        t_eval = np.linspace(*t_span, 11)
+        print(problem)
+        print(f"  {'':24} {'steps':>8} {'f evals':>8} {'J':>6} {'LU':>6} {'ms':>10} {'':>8}")
+        run('BDF, symbolic Jacobian', lambda: stiff.solve(f, t_span, [y0], t_eval, jac=jac, **tolerances))
+        run('BDF, finite differences', lambda: stiff.solve(f, t_span, [y0], t_eval, **tolerances))
+        run('Dormand-Prince', lambda: numerical.solve(f, t_span, [y0], t_eval, max_steps=args.max_steps, **tolerances))
+
+
+if __name__ == '__main__':
+    main()
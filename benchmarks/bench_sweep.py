@@ -0,0 +1,52 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from methods import sweep
+from methods.expressions import family
+from methods.numerical import solve
+
+# time a parameter sweep: the whole grid as one batch in this process, against the chunks spread over
+# the worker pool of methods/sweep.py, which also has the first results in much sooner
+# run as
+#   python -m benchmarks.bench_sweep [--points N] [--chunk N]
+
+EQUATION = "y' = cos(a x + b y) - y/4"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the process-pool parameter sweep.')
+    parser.add_argument('--points', type=int, default=10_000, help='points of the (square) parameter grid')
+    parser.add_argument('--chunk', type=int, nargs='+', default=[64, 256, 1024])
+    args = parser.parse_args(argv)
+    side = int(round(args.points ** 0.5))
+    axes = [np.linspace(-2, 2, side), np.linspace(-2, 2, side)]
+    t_eval = np.linspace(0, 10, 51)
+    F, names = family(EQUATION)
+    print(f'{EQUATION}, {side * side} parameter points, {os.cpu_count()} CPUs')
+
+    # in this process, the grid in one batch
+    a, b = (values.ravel() for values in np.meshgrid(*axes, indexing='ij'))
+    start = time.perf_counter()
+    solve(lambda x, y: (np.cos(a * x + b * y[:, 0]) - y[:, 0] / 4)[:, None], (0, 10), np.zeros((len(a), 1)), t_eval)
+    print(f"{'one batch':16} {time.perf_counter() - start:8.2f} s")
+
+    # start the workers, which import NumPy and SymPy once
+    list(sweep.Sweep(F, names, axes, 0.0, (0, 10), t_eval).results())
+    for chunk in args.chunk:
+        start = time.perf_counter()
+        running = sweep.Sweep(F, names, axes, 0.0, (0, 10), t_eval, chunk=chunk)
+        submitted = time.perf_counter() - start
+        first = None
+        for _ in running.results():
+            first = first or time.perf_counter() - start
+        total = time.perf_counter() - start
+        running.close()
+        print(f'pool, chunk {chunk:5} {total:8.2f} s   submitted after {submitted * 1e3:.1f} ms, '
+              f'first chunk after {first * 1e3:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
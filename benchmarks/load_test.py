@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+from flowchart import prefetch
+
+# headless load test of the Streamlit app: N simulated users click their way through the flowchart,
+# each in its own AppTest session, choosing uniformly among the navigation buttons on screen - the
+# answers, 'return to start' and 'go back', never the buttons of a node's tool.
+# AppTest sessions cannot run concurrently within one process (they share Streamlit's process-global
+# runtime), so the users are spread over worker processes that run in parallel, and each worker takes
+# turns clicking for its users - like several server replicas with interleaved sessions each.
+# run as
+#   python -m benchmarks.load_test [--users N] [--workers N] [--clicks N] [--json results.json] [--compare old.json]
+# and compare the JSON of two commits to spot regressions.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit_ode.py')
+
+
+# current resident set size in bytes (peak RSS where /proc is not available)
+def resident_memory():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+# the answer and "go back" buttons on screen, by the keys of flowchart/prefetch.py - not those of the
+# tools, which would start their work (e.g. a parameter sweep) instead of navigating
+def navigation(session):
+    return [button for button in session.button
+            if button.key == prefetch.BACK_KEY or (button.key or '').startswith(prefetch.edge_key(''))]
+
+
+# simulate some users in this process.
+# returns (rerun latencies, errors, resident memory per session, seconds spent clicking)
+def simulate_users(seeds, clicks, timeout):
+    # the first session pays for loading the flowchart, which is shared by all the others
+    AppTest.from_file(APP, default_timeout=timeout).run()
+
+    memory_before = resident_memory()
+    sessions = [AppTest.from_file(APP, default_timeout=timeout).run() for _ in seeds]
+    memory_per_session = (resident_memory() - memory_before) / len(seeds)
+
+    rngs = [random.Random(seed) for seed in seeds]
+    latencies, errors = [], []
+    began = time.perf_counter()
+    for _ in range(clicks):
+        for session, rng in zip(sessions, rngs):
+            if session.exception:
+                continue
+            button = rng.choice(navigation(session))
+            start = time.perf_counter()
+            button.click().run()
+            latencies.append(time.perf_counter() - start)
+            if session.exception:
+                errors.append(str(session.exception[0].message))
+    return latencies, errors, memory_per_session, time.perf_counter() - began
+
+
+def percentiles(values):
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(APP)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(users, workers, clicks, seed, timeout):
+    workers = min(workers, users)
+    seeds = [list(range(seed + i, seed + users, workers)) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(simulate_users, seeds, [clicks] * workers, [timeout] * workers))
+
+    latencies = [latency for result in results for latency in result[0]]
+    errors = [error for result in results for error in result[1]]
+    memory_per_session = statistics.mean(result[2] for result in results)
+    return {
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'users': users,
+        'workers': workers,
+        'clicks_per_user': clicks,
+        'reruns': len(latencies),
+        'errors': errors,
+        'latency_ms': {name: value * 1000 for name, value in percentiles(latencies).items()},
+        # workers click in parallel, so their rates add up
+        'throughput_per_s': sum(len(result[0]) / result[3] for result in results),
+        'memory_per_session_kib': memory_per_session / 1024,
+    }
+
+
+def compare(old, new):
+    rows = [('p50 ms', ('latency_ms', 'p50')), ('p95 ms', ('latency_ms', 'p95')), ('p99 ms', ('latency_ms', 'p99')),
+            ('reruns/s', ('throughput_per_s',)), ('KiB/session', ('memory_per_session_kib',))]
+    print(f"{'':12} {old.get('commit') or 'old':>10} {new.get('commit') or 'new':>10} {'change':>8}")
+    for name, keys in rows:
+        a, b = old, new
+        for key in keys:
+            a, b = a[key], b[key]
+        print(f'{name:12} {a:10.2f} {b:10.2f} {(b - a) / a:+8.1%}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the ODE app with simulated concurrent users.')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: one per CPU)')
+    parser.add_argument('--clicks', type=int, default=50, help='clicks per user')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=30, help='seconds before a single rerun counts as hung')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    results = run(args.users, args.workers, args.clicks, args.seed, args.timeout)
+    print(json.dumps(results, indent=1))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+    if results['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
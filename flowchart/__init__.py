@@ -0,0 +1,38 @@
+import hashlib
+import os
+import struct
+
+from .compiled import CompiledFlowchart
+
+# precompiled flowchart, written by `python -m flowchart.compiler` from the node files in SOURCE_DIR
+CACHE_PATH = os.path.join(os.path.dirname(__file__), 'flowchart.bin')
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), 'nodes')
+# content-addressed cache of pre-rendered labels, written by `python -m flowchart.prerender`
+RENDER_DIR = os.path.join(os.path.dirname(__file__), 'rendered')
+
+
+# sha256 of the flowchart source: the names and contents of the node files. stored in the compiled
+# flowchart, so that a stale blob is recognised whatever the files' modification times - which a git
+# checkout sets in no particular order
+def source_digest(directory=SOURCE_DIR):
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.toml'):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                data = f.read()
+            digest.update(struct.pack('<II', len(filename), len(data)) + filename.encode('utf-8') + data)
+    return digest.hexdigest()
+
+
+# load the precompiled flowchart. if it is missing, outdated or unreadable, compile the source in memory
+# instead - slower to start, but never wrong. this does not write anything to disk.
+def load_flowchart(path=CACHE_PATH, source_dir=SOURCE_DIR):
+    try:
+        chart = CompiledFlowchart.load(path)
+        if chart.source_digest == source_digest(source_dir):
+            return chart
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        pass
+
+    from .compiler import compile_flowchart
+    return compile_flowchart(source_dir)
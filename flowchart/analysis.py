@@ -0,0 +1,77 @@
+from collections import deque
+
+# build-time analysis of the flowchart graph, run by the compiler. it precomputes the path tables that
+# are stored with the compiled flowchart, so the app never has to search the graph, and finds the
+# problems the compiler warns about.
+#
+# 'forward' edges are all edges except 'return to start', and technique nodes are the nodes whose
+# source names a solution technique. for every node, the tables hold
+# - depth and parent: the number of answers on the shortest way from the start node, and the node
+#   before it on that way
+# - to_go: the smallest number of answers from the node on to any technique node
+# with NO_PATH where there is no such way.
+
+NO_PATH = 0xffff
+
+
+# out_edges[n] are the (reply, target) pairs of node n, techniques[n] its technique title or ''.
+# returns the tables depth, parent and to_go as a dict of lists
+def analyse(out_edges, techniques, return_label):
+    forward = [[target for reply, target in edges if reply != return_label] for edges in out_edges]
+
+    depth, parent = [NO_PATH] * len(forward), [NO_PATH] * len(forward)
+    depth[0] = 0
+    queue = deque([0])
+    while queue:
+        node = queue.popleft()
+        for target in forward[node]:
+            if depth[target] == NO_PATH:
+                depth[target] = depth[node] + 1
+                parent[target] = node
+                queue.append(target)
+
+    # one breadth-first search backwards from all technique nodes at once
+    backward = [[] for _ in forward]
+    for node, targets in enumerate(forward):
+        for target in targets:
+            backward[target].append(node)
+    to_go = [0 if technique else NO_PATH for technique in techniques]
+    queue = deque(node for node, technique in enumerate(techniques) if technique)
+    while queue:
+        node = queue.popleft()
+        for source in backward[node]:
+            if to_go[source] == NO_PATH:
+                to_go[source] = to_go[node] + 1
+                queue.append(source)
+
+    return {'depth': depth, 'parent': parent, 'to_go': to_go}
+
+
+def is_placeholder(label):
+    return label.strip().upper().startswith('TBD')
+
+
+# everything about a compiled flowchart that is not invalid, but should not ship: nodes nobody can get
+# to, questions without answers (dead ends), answer chains that never reach a technique, and nodes that
+# still say TBD. returns a list of messages
+def find_problems(chart, return_label):
+    def listing(nodes):
+        return ', '.join(f'{chart.names[node]} ({node})' for node in nodes)
+
+    nodes = range(len(chart))
+    unreachable = [node for node in nodes if chart.depth(node) is None]
+    dead_ends = [node for node in nodes if not chart.technique(node)
+                 and all(reply == return_label for reply, _ in chart.out_edges(node))]
+    no_technique = [node for node in nodes if chart.questions_to_go(node) is None and node not in dead_ends]
+    placeholders = [node for node in nodes if is_placeholder(chart.label(node))]
+
+    problems = []
+    if unreachable:
+        problems.append(f'unreachable from the start: {listing(unreachable)}')
+    if dead_ends:
+        problems.append(f'dead ends (no answers, and not a technique): {listing(dead_ends)}')
+    if no_technique:
+        problems.append(f'no technique can be reached from: {listing(no_technique)}')
+    if placeholders:
+        problems.append(f'placeholders that still say TBD: {listing(placeholders)}')
+    return problems
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+
+from . import load_flowchart
+
+# a small JSON API over HTTP for walking the flowchart without Streamlit, e.g. from another frontend
+# or a chatbot. it serves the same compiled flowchart as the app:
+#   GET /node/{id}   the node: its label (and pre-rendered HTML), technique, and the (reply, next) pairs
+#   POST /walk       a JSON list of replies, taken one after the other from the start node, or
+#                    {"from": id, "replies": [...]} to start somewhere else. answers with the nodes on
+#                    the way and the node arrived at
+# the responses of all nodes are serialised once at startup, so that serving one is a dictionary
+# lookup and a write. connections are kept alive, and any origin may call the API.
+# run as
+#   python -m flowchart.api [--host HOST] [--port PORT]
+
+HOST = '127.0.0.1'
+PORT = 8765
+# longest request head and body read, how long an idle connection is kept open, and how long the head
+# and body of a request may take to arrive once it has started
+MAX_HEAD = 8192
+MAX_BODY = 65536
+IDLE_TIMEOUT = 30.0
+REQUEST_TIMEOUT = 10.0
+
+REASONS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           408: 'Request Timeout', 413: 'Payload Too Large', 422: 'Unprocessable Entity', 431: 'Request Header Fields Too Large'}
+
+CORS = (b'Access-Control-Allow-Origin: *\r\n'
+        b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+        b'Access-Control-Allow-Headers: Content-Type\r\n')
+
+
+# the whole response, (keep-alive, close) - they only differ in the Connection header
+def response(status, body=b'', content_type=b'application/json'):
+    head = (f'HTTP/1.1 {status} {REASONS[status]}\r\n'.encode() + CORS
+            + (b'Content-Type: ' + content_type + b'\r\n' if body else b'')
+            + f'Content-Length: {len(body)}\r\n'.encode())
+    return head + b'\r\n' + body, head + b'Connection: close\r\n\r\n' + body
+
+
+def error(status, message, **details):
+    return response(status, json.dumps({'error': message, **details}).encode())
+
+
+class FlowchartAPI:
+    __slots__ = ('chart', 'nodes', 'bodies', 'replies', 'options')
+
+    def __init__(self, chart):
+        self.chart = chart
+        # the JSON of every node, alone and as a whole response
+        self.bodies = [json.dumps(self.node(node), ensure_ascii=False).encode() for node in range(len(chart))]
+        self.nodes = {str(node): response(200, body) for node, body in enumerate(self.bodies)}
+        self.replies = [dict(chart.out_edges(node)) for node in range(len(chart))]
+        self.options = response(204)
+
+    def node(self, node):
+        chart = self.chart
+        return {
+            'id': node,
+            'name': chart.names[node],
+            'label': chart.label(node),
+            'label_html': chart.label_html(node) or None,
+            'technique': chart.technique(node) or None,
+            'questions_to_go': chart.questions_to_go(node),
+            'edges': [{'reply': reply, 'next': target} for reply, target in chart.out_edges(node)],
+        }
+
+    # the response to a request, as (keep-alive, close)
+    def respond(self, method, path, body):
+        # CORS preflight
+        if method == 'OPTIONS':
+            return self.options
+        if path.startswith('/node/'):
+            if method != 'GET':
+                return error(405, 'use GET')
+            return self.nodes.get(path[6:]) or error(404, f'there is no node {path[6:]}')
+        if path == '/walk':
+            if method != 'POST':
+                return error(405, 'use POST')
+            return self.walk(body)
+        return error(404, 'try GET /node/{id} or POST /walk')
+
+    def walk(self, body):
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return error(400, 'the body is not JSON')
+        if isinstance(request, dict):
+            node, replies = request.get('from', 0), request.get('replies')
+        else:
+            node, replies = 0, request
+        if not isinstance(replies, list) or not all(isinstance(reply, str) for reply in replies):
+            return error(400, 'the replies are not a list of strings')
+        if type(node) is not int or not 0 <= node < len(self.bodies):
+            return error(404, f'there is no node {node}')
+        path = [node]
+        for reply in replies:
+            next_node = self.replies[node].get(reply)
+            if next_node is None:
+                return error(422, f'{reply!r} is not a reply to node {node}', path=path,
+                             replies=list(self.replies[node]))
+            node = next_node
+            path.append(node)
+        return response(200, b'{"path": ' + json.dumps(path).encode() + b', "node": ' + self.bodies[node] + b'}')
+
+    # serve one connection: HTTP/1.1 requests one after the other, until the client closes it, asks
+    # to close it, or is idle for too long. a request whose head and body do not arrive in time is
+    # answered with 408, by a timer rather than wait_for, which would start a task for every read
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+
+        def expire():
+            writer.write(error(408, 'the request did not arrive in time')[1])
+            # the read waiting for the request then fails
+            writer.close()
+
+        timer = None
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(reader.readexactly(1), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                timer = loop.call_later(REQUEST_TIMEOUT, expire)
+                try:
+                    head = first + await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    writer.write(error(431, 'the request head is too long')[1])
+                    break
+                try:
+                    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                    method, target, version = request_line.split(' ')
+                    headers = dict(line.split(':', 1) for line in header_lines if line)
+                    headers = {name.strip().lower(): value.strip() for name, value in headers.items()}
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(error(400, 'that is not an HTTP request')[1])
+                    break
+                if length > MAX_BODY:
+                    writer.write(error(413, f'the body is longer than {MAX_BODY} bytes')[1])
+                    break
+                body = await reader.readexactly(length) if length else b''
+                timer.cancel()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                writer.write(self.respond(method, target.split('?', 1)[0], body)[0 if keep_alive else 1])
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if timer is not None:
+                timer.cancel()
+            writer.close()
+
+
+async def serve(chart, host=HOST, port=PORT):
+    api = FlowchartAPI(chart)
+    server = await asyncio.start_server(api.handle, host, port, limit=MAX_HEAD)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f'serving the flowchart on http://{host}:{port}', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the ODE flowchart as a JSON API.')
+    parser.add_argument('--host', default=HOST, help=f'address to listen on (default: {HOST})')
+    parser.add_argument('--port', type=int, default=PORT, help=f'port to listen on, 0 for any free one (default: {PORT})')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(load_flowchart(), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
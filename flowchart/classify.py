@@ -0,0 +1,352 @@
+import re
+import string
+import threading
+from collections import OrderedDict
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (convert_xor, implicit_multiplication_application, parse_expr,
+                                        standard_transformations)
+
+from . import workers
+
+# classify an ODE typed in by the user, by answering the flowchart's questions for them
+#
+# the equation is parsed with SymPy and brought into the form y' = F(x, y). then the checks below run
+# on worker processes of this request's own (see flowchart/workers.py), several at once, and the
+# flowchart is walked from the start, answering every question from their results, for as long as
+# there is an answer - the walk ends on the deepest node the checks can vouch for. a check that takes
+# longer than CHECK_TIMEOUT from when it starts counts as inconclusive, so the walk stops at the
+# question it would have answered, and its worker is killed - no other request shares it.
+#
+# parsing runs in a worker as well, since SymPy evaluates what it parses (2^9^9^9 takes forever), and
+# only a small, whitelisted set of names is ever passed to it. the walks are memoised by the
+# canonical form of F - students type in the same textbook equations over and over.
+#
+# this needs SymPy, which the app imports lazily, only once someone types in an equation.
+
+MAX_LENGTH = 300
+PARSE_TIMEOUT = 2.0
+CHECK_TIMEOUT = 3.0
+CACHE_SIZE = 4096
+
+x, y = sp.symbols('x y')
+# the first and higher derivatives of y, which the parser sees under these names
+DERIVATIVES = [sp.Symbol(f'Dy{order}') for order in range(10)]
+
+FUNCTIONS = {
+    'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan, 'cot': sp.cot, 'sec': sp.sec, 'csc': sp.csc,
+    'asin': sp.asin, 'acos': sp.acos, 'atan': sp.atan, 'arcsin': sp.asin, 'arccos': sp.acos, 'arctan': sp.atan,
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh,
+    'exp': sp.exp, 'log': sp.log, 'ln': sp.log, 'sqrt': sp.sqrt, 'abs': sp.Abs, 'pi': sp.pi,
+}
+# any other letter is a constant, except for x, y and e
+LOCALS = {letter: sp.Symbol(letter) for letter in string.ascii_letters}
+LOCALS.update(FUNCTIONS, x=x, y=y, e=sp.E, **{symbol.name: symbol for symbol in DERIVATIVES})
+
+ALLOWED = re.compile(r"[\w\s+\-*/^().,'=]*", re.ASCII)
+NAME = re.compile(r'[A-Za-z]+')
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+
+
+# turn the text into (order, F): order is that of the highest derivative of y, F the right-hand side of
+# y' = F(x, y) for explicit first-order equations and None otherwise. raises EquationError if it is no ODE:
+# it has to be an equation with a derivative of y in it, written out, like y' = x y
+def parse(text):
+    text = re.sub(r'(?<![A-Za-z])y\s*\(\s*x\s*\)', 'y', text)
+    text = re.sub(r'\bd\s*y\s*/\s*d\s*x\b', "y'", text)
+    if '_' in text or re.search(r'[A-Za-z)]\.|\.(?!\d)', text):
+        raise EquationError('that does not look like an equation')
+    # names SymPy does not need to know are split into one-letter constants: ax is a*x
+    text = NAME.sub(lambda m: m[0] if m[0] in FUNCTIONS else ' '.join(m[0]), text)
+    text = re.sub(r"(?<![A-Za-z])y\s*('+)", lambda m: f' Dy{len(m[1])} ', text)
+    if "'" in text:
+        raise EquationError("only y can be differentiated, like y'")
+    if text.count('=') != 1:
+        raise EquationError("an equation has one =, like y' = x y")
+
+    sides = [parse_expr(side, local_dict=LOCALS, transformations=TRANSFORMATIONS) for side in text.split('=')]
+    equation = sides[0] - sides[1]
+    if equation.has(sp.zoo, sp.nan):
+        raise EquationError('that equation is undefined, like 1/0')
+    orders = [order for order, symbol in enumerate(DERIVATIVES) if equation.has(symbol)]
+    if not orders or orders[-1] == 0:
+        raise EquationError("there is no derivative y' in that equation")
+    order = orders[-1]
+    if order > 1:
+        return order, None
+
+    coefficient = sp.diff(equation, DERIVATIVES[1])
+    if coefficient.has(DERIVATIVES[1]):
+        return 1, None
+    rhs = sp.simplify(-equation.subs(DERIVATIVES[1], 0) / coefficient)
+    if rhs.has(sp.zoo, sp.nan):
+        raise EquationError('that equation is undefined, like 1/0')
+    return 1, rhs
+
+
+def _free(expr, *symbols):
+    return not any(expr.has(symbol) for symbol in symbols)
+
+
+def _constant(expr):
+    return _free(expr, x, y)
+
+
+# the terms of F, each split into (factor without y, power of y), or None if some term is not of that shape
+def _powers_of_y(F):
+    powers = []
+    for term in sp.Add.make_args(sp.expand(F)):
+        factor, power = term.as_independent(y, as_Add=False)
+        base, exponent = power.as_base_exp()
+        if power == 1:
+            exponent = 0
+        elif base != y or not _constant(exponent):
+            return None
+        powers.append((factor, exponent))
+    return powers
+
+
+# the checks: each takes F and returns the answer to one of the flowchart's questions
+
+# which of x and y F depends on: 'x' (also for constants), 'y' or 'xy'
+def depends_on(F):
+    return 'xy' if F.has(x) and F.has(y) else 'y' if F.has(y) else 'x'
+
+
+def is_separable(F):
+    return sp.separatevars(F, symbols=(x, y), dict=True, force=True) is not None
+
+
+def is_linear(F):
+    return _free(sp.simplify(sp.diff(F, y)), y)
+
+
+# F = -P(x) y + Q(x) y^nu
+def is_bernoulli(F):
+    powers = _powers_of_y(F)
+    if not powers:
+        return False
+    exponents = {exponent for _, exponent in powers}
+    return 0 not in exponents and len(exponents - {1}) == 1
+
+
+def is_monomial(F):
+    if isinstance(F, sp.Add):
+        return False
+    factor, rest = F.as_independent(x, y, as_Add=False)
+    return all(base in (x, y) and _constant(exponent) for base, exponent in rest.as_powers_dict().items())
+
+
+# F = f(ax + by + c): then F_x / F_y = a / b is a constant
+def is_ax_by_c(F):
+    Fx, Fy = sp.diff(F, x), sp.diff(F, y)
+    return Fx != 0 and Fy != 0 and _constant(sp.simplify(Fx / Fy))
+
+
+# F = f(y/x): then F(x, t x) does not depend on x
+def is_homogeneous(F):
+    t = sp.Dummy('t')
+    return _free(sp.simplify(F.subs(y, t * x)), x)
+
+
+# F = f((ax + by + c) / (rx + sy + t)): look for such a fraction g in F, such that F depends on x and y
+# through g only. returns 'zero' or 'nonzero' for the determinant as - rb, or None
+def shiftable(F):
+    Fx, Fy = sp.diff(F, x), sp.diff(F, y)
+    for g in sp.preorder_traversal(F):
+        numerator, denominator = sp.fraction(sp.together(g))
+        if _constant(numerator) or _constant(denominator):
+            continue
+        if not (numerator.is_polynomial(x, y) and denominator.is_polynomial(x, y)):
+            continue
+        numerator, denominator = sp.Poly(numerator, x, y), sp.Poly(denominator, x, y)
+        if numerator.total_degree() > 1 or denominator.total_degree() > 1:
+            continue
+        if not all(_constant(c) for c in numerator.coeffs() + denominator.coeffs()):
+            continue
+        g = numerator.as_expr() / denominator.as_expr()
+        if sp.simplify(Fx * sp.diff(g, y) - Fy * sp.diff(g, x)) != 0:
+            continue
+        a, b = numerator.coeff_monomial(x), numerator.coeff_monomial(y)
+        r, s = denominator.coeff_monomial(x), denominator.coeff_monomial(y)
+        return 'zero' if sp.simplify(a * s - r * b) == 0 else 'nonzero'
+    return None
+
+
+# F = p(x) + q(x) y + r(x) y^2
+def is_riccati(F):
+    F = sp.expand(F)
+    return F.is_polynomial(y) and sp.Poly(F, y).degree() == 2
+
+
+# F = a x^alpha + b y^2 with constants a, b: returns '2', 'mminus' or 'mplus' if alpha is -2,
+# -4m/(2m-1) or -4m/(2m+1) with a positive integer m, None otherwise
+def special_riccati(F):
+    powers = _powers_of_y(F)
+    if not powers or sorted(exponent for _, exponent in powers) != [0, 2]:
+        return None
+    (a, _), (b, _) = sorted(powers, key=lambda power: power[1])
+    if not _constant(b):
+        return None
+    coefficient, power = a.as_independent(x, as_Add=False)
+    base, alpha = power.as_base_exp()
+    if not _constant(coefficient) or base != x or not alpha.is_number:
+        return None
+    if alpha == -2:
+        return '2'
+    for shape, m in (('mminus', alpha / (2 * alpha + 4)), ('mplus', -alpha / (2 * alpha + 4))):
+        if m.is_integer and m > 0:
+            return shape
+    return None
+
+
+CHECKS = {check.__name__: check for check in (depends_on, is_separable, is_linear, is_bernoulli, is_monomial,
+                                              is_ax_by_c, is_homogeneous, shiftable, is_riccati, special_riccati)}
+# result of a check that timed out or failed
+UNKNOWN = object()
+
+
+# how the questions are answered, by node name: either the next node, or a check and the next node for
+# each of its results. the walk ends at nodes that are not in here, or when there is no next node
+DECISIONS = {
+    'start': 'is_ode',
+    'is_ode': 'is_single_ode',
+    'is_single_ode': 'is_explicit_ode',
+    'is_explicit_ode': 'is_firstorder',
+    'is_firstorder': ('depends_on', {'x': 'can_be_integrated_directly', 'y': 'is_autonomous',
+                                     'xy': 'is_nonautonomous'}),
+    'is_nonautonomous': ('is_separable', {True: 'is_separable', False: 'is_nonseparable'}),
+    'is_nonseparable': ('is_linear', {True: 'is_linear_firstorder', False: 'is_nonlinear_firstorder'}),
+    # the trial solutions are worth a try, but we can tell more
+    'is_nonlinear_firstorder': 'has_no_obvious_ansatz',
+    'has_no_obvious_ansatz': ('is_bernoulli', {True: 'is_bernoulli', False: 'is_not_bernoulli'}),
+    'is_not_bernoulli': ('is_monomial', {True: 'is_monomial', False: 'is_not_monomial'}),
+    'is_not_monomial': ('is_ax_by_c', {True: 'is_ax_by_c', False: 'is_not_ax_by_c'}),
+    'is_not_ax_by_c': ('is_homogeneous', {True: 'is_homogeneous', False: 'is_not_homogeneous'}),
+    'is_not_homogeneous': ('shiftable', {'nonzero': 'is_shiftable_nonzero_det', 'zero': 'is_shiftable_zero_det',
+                                         None: 'is_not_shiftable'}),
+    'is_not_shiftable': ('is_riccati', {True: 'is_riccati', False: 'is_not_general_riccati'}),
+    # special Riccati equations are Riccati equations too, but have their own, better techniques
+    'is_riccati': ('special_riccati', dict.fromkeys(('2', 'mminus', 'mplus'), 'is_not_general_riccati')),
+    'is_not_general_riccati': ('special_riccati', {'2': 'is_special_riccati_2', 'mminus': 'is_special_riccati_mminus',
+                                                   'mplus': 'is_special_riccati_mplus',
+                                                   None: 'has_no_substitutions_firstorder'}),
+}
+
+
+class EquationError(ValueError):
+    pass
+
+
+# parse in a worker process. anything SymPy does not understand is not an equation
+def _parse(text):
+    try:
+        return parse(text)
+    except EquationError:
+        raise
+    except Exception:
+        raise EquationError('that does not look like an equation') from None
+
+
+def _run_check(name, F):
+    return CHECKS[name](F)
+
+
+# the workers import this module, and with it SymPy, before they take any work
+MODULES = (__name__,)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _remember(key, value):
+    with _cache_lock:
+        _cache[key] = value
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+# walk the flowchart with the results of the checks, returns the names of the nodes on the way
+def walk(checks, node='start'):
+    path = [node]
+    while path[-1] in DECISIONS:
+        decision = DECISIONS[path[-1]]
+        if isinstance(decision, tuple):
+            check, answers = decision
+            if checks[check] is UNKNOWN or checks[check] not in answers:
+                break
+            decision = answers[checks[check]]
+        path.append(decision)
+    return path
+
+
+# parse in a worker process, with a time limit - safe for any text a user may type in.
+# returns (order, F) like parse, raises EquationError with a message for the user
+def parse_safely(text):
+    text = ' '.join(text.split())
+    if not text:
+        raise EquationError('please type in an equation')
+    if len(text) > MAX_LENGTH or not ALLOWED.fullmatch(text):
+        raise EquationError('that does not look like an equation')
+    try:
+        return workers.call(_parse, (text,), PARSE_TIMEOUT, MODULES)
+    except TimeoutError:
+        raise EquationError('that equation takes too long to even read') from None
+    except EquationError:
+        raise
+    # the worker died or could not be started
+    except Exception:
+        raise EquationError('something went wrong reading that equation, please try again') from None
+
+
+# classify the ODE in text. returns the ids of the nodes on the way through chart, from the start node
+# to the deepest node that applies, and the names of the checks that were inconclusive.
+# raises EquationError with a message for the user if text cannot be understood
+def classify(chart, text):
+    text = ' '.join(text.split())
+    key = ('text', text)
+    result = _cached(key)
+    if result is None:
+        result = _classify(text)
+        if not result[1]:
+            _remember(key, result)
+
+    ids = {name: node for node, name in enumerate(chart.names)}
+    nodes = [0]
+    for name in result[0][1:]:
+        # stop where the flowchart has changed since DECISIONS was written
+        if name not in ids or ids[name] not in chart.successors(nodes[-1]):
+            break
+        nodes.append(ids[name])
+    return nodes, result[1]
+
+
+# returns (names of the nodes on the way, names of the inconclusive checks)
+def _classify(text):
+    order, F = parse_safely(text)
+    if F is None:
+        if order == 1:
+            return ['start', 'is_ode', 'is_single_ode', 'is_implicit_ode'], []
+        return ['start', 'is_ode', 'is_single_ode', 'is_explicit_ode', 'is_higher_than_first_order'], []
+
+    key = ('F', sp.srepr(F))
+    result = _cached(key)
+    if result is not None:
+        return result
+
+    # each check gets CHECK_TIMEOUT from when it starts, not from when it was queued
+    results = workers.call_all([(_run_check, (name, F)) for name in CHECKS], CHECK_TIMEOUT, MODULES)
+    checks = {name: UNKNOWN if isinstance(result, Exception) else result for name, result in zip(CHECKS, results)}
+
+    result = walk(checks), [name for name, value in checks.items() if value is UNKNOWN]
+    if not result[1]:
+        _remember(key, result)
+    return result
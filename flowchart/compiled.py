@@ -0,0 +1,232 @@
+import marshal
+import mmap
+import struct
+import sys
+from array import array
+
+from .analysis import NO_PATH
+
+# compact, read-only form of the flowchart that the app uses at runtime
+#
+# node ids are the integers 0..N-1, so every per-node table is a plain tuple or array indexed by id.
+# adjacency is stored CSR-style: the out-edges of node n are the entries indptr[n]:indptr[n+1] of
+# indices (target node) and edge_label_ids (index into the table of distinct edge labels).
+# on top of that, the (reply, target) pairs of every node are precomputed once, so rendering a node
+# is two tuple lookups and allocates nothing.
+#
+# node labels are the bulk of the data, so they stay encoded in one blob and each one is only
+# decoded the first time its node is shown. when loaded from a file, that blob is memory-mapped,
+# so labels of nodes nobody visits are never even read from disk. the same goes for the pre-rendered
+# HTML of the labels (see prerender.py), which follows the labels in the blob; it is empty for labels
+# that have not been pre-rendered.
+#
+# the flowchart also carries the results of the build-time graph analysis (see analysis.py): the
+# technique each node names, if any, and per node the shortest way there from the start node (as
+# depth and parent) and the number of answers still to go to the nearest technique, and the inverted
+# index for full-text search over the labels (see search.py).
+#
+# this module only depends on the standard library, so that the app can start without networkx.
+
+# file layout: MAGIC, format version and header length as little-endian uint32, the marshalled
+# header, then the utf-8 encoded labels back to back, then their HTML back to back.
+# bump FORMAT_VERSION whenever the layout changes, so that stale caches are rebuilt instead of misread
+MAGIC = b'ODEF'
+FORMAT_VERSION = 6
+_PREAMBLE = struct.Struct('<4sII')
+
+
+class CompiledFlowchart:
+    __slots__ = ('names', 'edge_labels', 'edge_label_html', 'indptr', 'indices', 'edge_label_ids',
+                 'label_offsets', 'html_offsets', 'techniques', 'depths', 'parents', 'to_go',
+                 'index_terms', 'index_indptr', 'index_nodes', 'index_weights', 'source_digest',
+                 '_data', '_labels', '_html', '_out_edges')
+
+    # label_offsets and html_offsets both index into data: label n is data[label_offsets[n]:label_offsets[n+1]].
+    # techniques[n] is the technique title of node n or '', depths, parents and to_go are the tables of
+    # analysis.py with NO_PATH where there is no way, and index_* the search index of search.py.
+    # source_digest is flowchart.source_digest of the source it was compiled from, '' if unknown
+    def __init__(self, names, edge_labels, edge_label_html, indptr, indices, edge_label_ids,
+                 label_offsets, html_offsets, techniques, depths, parents, to_go,
+                 index_terms, index_indptr, index_nodes, index_weights, data, source_digest=''):
+        self.names = tuple(names)
+        self.edge_labels = tuple(sys.intern(label) for label in edge_labels)
+        self.edge_label_html = tuple(edge_label_html)
+        self.indptr = array('H', indptr)
+        self.indices = array('H', indices)
+        self.edge_label_ids = array('H', edge_label_ids)
+        self.label_offsets = array('I', label_offsets)
+        self.html_offsets = array('I', html_offsets)
+        self.techniques = tuple(techniques)
+        self.depths = array('H', depths)
+        self.parents = array('H', parents)
+        self.to_go = array('H', to_go)
+        self.index_terms = tuple(index_terms)
+        self.index_indptr = array('I', index_indptr)
+        self.index_nodes = array('H', index_nodes)
+        self.index_weights = array('H', index_weights)
+        self.source_digest = source_digest
+        self._data = data
+        self._labels = [None] * len(self.names)
+        self._html = [None] * len(self.names)
+
+        if not len(self.indptr) == len(self.label_offsets) == len(self.html_offsets) == len(self.names) + 1:
+            raise ValueError('indptr, label_offsets and html_offsets must have one entry more than there are nodes')
+        if not len(self.indices) == len(self.edge_label_ids) == self.indptr[-1]:
+            raise ValueError('indices and edge_label_ids must have one entry per edge')
+        if not len(self.techniques) == len(self.depths) == len(self.parents) == len(self.to_go) == len(self.names):
+            raise ValueError('techniques, depths, parents and to_go must have one entry per node')
+        if not (len(self.index_indptr) == len(self.index_terms) + 1
+                and len(self.index_nodes) == len(self.index_weights) == self.index_indptr[-1]):
+            raise ValueError('the search index tables do not fit together')
+        if len(self.edge_label_html) != len(self.edge_labels):
+            raise ValueError('edge_label_html must have one entry per edge label')
+        if self.html_offsets[-1] > len(data):
+            raise ValueError('label data is truncated')
+
+        self._out_edges = tuple(
+            tuple((self.edge_labels[self.edge_label_ids[i]], self.indices[i])
+                  for i in range(self.indptr[node], self.indptr[node + 1]))
+            for node in range(len(self.names))
+        )
+
+    # build from per-node lists: labels[n] is the text of node n, out_edges[n] its (reply, target) pairs,
+    # techniques[n] its technique title or ''. paths is the dict of tables returned by analysis.analyse,
+    # index the tables returned by search.build_index.
+    # render is called with every node and edge label and returns its pre-rendered HTML, or None
+    @classmethod
+    def from_lists(cls, names, labels, out_edges, techniques=None, paths=None, index=None,
+                   render=lambda label, inline: None, source_digest=''):
+        if techniques is None:
+            techniques = [''] * len(names)
+        if paths is None:
+            paths = dict.fromkeys(('depth', 'parent', 'to_go'), [NO_PATH] * len(names))
+        if index is None:
+            index = ((), [0], [], [])
+        edge_labels, edge_label_index = [], {}
+        indptr, indices, edge_label_ids = [0], [], []
+        for edges in out_edges:
+            for label, target in edges:
+                if label not in edge_label_index:
+                    edge_label_index[label] = len(edge_labels)
+                    edge_labels.append(label)
+                indices.append(target)
+                edge_label_ids.append(edge_label_index[label])
+            indptr.append(len(indices))
+
+        encoded = [label.encode('utf-8') for label in labels]
+        encoded += [(render(label, False) or '').encode('utf-8') for label in labels]
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        label_offsets, html_offsets = offsets[:len(labels) + 1], offsets[len(labels):]
+        edge_label_html = [render(label, True) or '' for label in edge_labels]
+        return cls(names, edge_labels, edge_label_html, indptr, indices, edge_label_ids, label_offsets,
+                   html_offsets, techniques, paths['depth'], paths['parent'], paths['to_go'], *index,
+                   b''.join(encoded), source_digest)
+
+    # serialise to / from the file layout above. the integer tables are stored as raw machine-order
+    # bytes, so a cache is only read on machines of the byte order that wrote it - others compile the
+    # source instead
+    def dumps(self):
+        header = marshal.dumps((self.names, self.edge_labels, self.edge_label_html, self.indptr.tobytes(),
+                                self.indices.tobytes(), self.edge_label_ids.tobytes(),
+                                self.label_offsets.tobytes(), self.html_offsets.tobytes(), self.techniques,
+                                self.depths.tobytes(), self.parents.tobytes(), self.to_go.tobytes(),
+                                self.index_terms, self.index_indptr.tobytes(), self.index_nodes.tobytes(),
+                                self.index_weights.tobytes(), self.source_digest, sys.byteorder))
+        data = self._data[:self.html_offsets[-1]]
+        return _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)) + header + bytes(data)
+
+    # buffer can be anything that supports slicing, e.g. bytes or an mmap. labels are sliced out of it
+    # lazily, so it has to stay valid for the lifetime of the flowchart
+    @classmethod
+    def loads(cls, buffer):
+        magic, version, header_size = _PREAMBLE.unpack(buffer[:_PREAMBLE.size])
+        if magic != MAGIC:
+            raise ValueError('not a compiled flowchart')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'compiled flowchart has format version {version}, expected {FORMAT_VERSION}')
+        start = _PREAMBLE.size + header_size
+        header = marshal.loads(buffer[_PREAMBLE.size:start])
+        (names, edge_labels, edge_label_html, indptr, indices, edge_label_ids, label_offsets, html_offsets,
+         techniques, depths, parents, to_go, index_terms, index_indptr, index_nodes, index_weights,
+         source_digest, byteorder) = header
+        if byteorder != sys.byteorder:
+            raise ValueError(f'compiled flowchart is {byteorder}-endian, this machine is {sys.byteorder}-endian')
+        return cls(names, edge_labels, edge_label_html, _table('H', indptr), _table('H', indices),
+                   _table('H', edge_label_ids), _table('I', label_offsets), _table('I', html_offsets),
+                   techniques, _table('H', depths), _table('H', parents), _table('H', to_go),
+                   index_terms, _table('I', index_indptr), _table('H', index_nodes), _table('H', index_weights),
+                   memoryview(buffer)[start:], source_digest)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            # the mapping stays valid after the file is closed
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.loads(buffer)
+
+    def __len__(self):
+        return len(self.names)
+
+    def label(self, node):
+        label = self._labels[node]
+        if label is None:
+            start, end = self.label_offsets[node], self.label_offsets[node + 1]
+            label = self._labels[node] = str(self._data[start:end], 'utf-8')
+        return label
+
+    # pre-rendered HTML of the label of node, or '' if it has not been pre-rendered
+    def label_html(self, node):
+        html = self._html[node]
+        if html is None:
+            start, end = self.html_offsets[node], self.html_offsets[node + 1]
+            html = self._html[node] = str(self._data[start:end], 'utf-8')
+        return html
+
+    def rendered_count(self):
+        return sum(self.html_offsets[node + 1] > self.html_offsets[node] for node in range(len(self)))
+
+    # tuple of (reply, target node) for every outgoing edge of node
+    def out_edges(self, node):
+        return self._out_edges[node]
+
+    def successors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def num_edges(self):
+        return len(self.indices)
+
+    # title of the technique node names, or '' if it is a question
+    def technique(self, node):
+        return self.techniques[node]
+
+    # the technique nodes, in order of their ids
+    def technique_nodes(self):
+        return tuple(node for node, technique in enumerate(self.techniques) if technique)
+
+    # number of answers on the shortest way from the start node to node, None if there is no way
+    def depth(self, node):
+        depth = self.depths[node]
+        return None if depth == NO_PATH else depth
+
+    # the nodes on the shortest way from the start node to node, both included. () if there is no way
+    def path_to(self, node):
+        if self.depths[node] == NO_PATH:
+            return ()
+        path = [node]
+        while node:
+            node = self.parents[node]
+            path.append(node)
+        return tuple(reversed(path))
+
+    # smallest number of answers from node to any technique, None if no technique can be reached
+    def questions_to_go(self, node):
+        to_go = self.to_go[node]
+        return None if to_go == NO_PATH else to_go
+
+
+def _table(typecode, data):
+    table = array(typecode)
+    table.frombytes(data)
+    return table
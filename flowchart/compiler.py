@@ -0,0 +1,167 @@
+import argparse
+import os
+import sys
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # python < 3.11
+    import tomli as tomllib
+
+from . import CACHE_PATH, RENDER_DIR, SOURCE_DIR, source_digest
+from .analysis import analyse, find_problems
+from .compiled import CompiledFlowchart
+from .prerender import read_rendered
+from .search import build_index
+
+# compile the flowchart source into the blob that the app loads at startup
+# run as
+#   python -m flowchart.compiler [-o output path] [--check] [--strict]
+# whenever the flowchart source has changed
+#
+# the source is one TOML file per node in flowchart/nodes. the file name (without .toml) is the node's
+# name, which edges use to refer to it. every node has a fixed integer id - these appear in links and
+# logs, so they must stay stable - and the ids have to be exactly 0..N-1. for example:
+#
+#   id = 5
+#   technique = 'Separation of variables'   # only on nodes that name a solution technique
+#   label = '''
+#   So we have a single first-order ODE. Does the right-hand side ...
+#   '''
+#
+#   [[edges]]
+#   to = "can_be_integrated_directly"
+#   label = '$F$ is a function of $x$ only'
+#
+# edges keep their order in the file, which is the order of the buttons in the app. every node except
+# the start node gets a final 'return to start' edge added automatically.
+#
+# labels that have been pre-rendered to HTML by `python -m flowchart.prerender` are embedded with it,
+# and so are the path tables computed by the analysis in analysis.py and the search index of search.py.
+# problems that analysis finds (unreachable nodes, dead ends, TBD placeholders) are printed as
+# warnings, or are errors with --strict.
+
+START = 'start'
+RETURN_TO_START = 'return to start'
+
+NODE_KEYS = {'id', 'technique', 'label', 'edges'}
+EDGE_KEYS = {'to', 'label'}
+
+
+class FlowchartError(ValueError):
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__('invalid flowchart source:\n' + '\n'.join(f'  {problem}' for problem in problems))
+
+
+# parse all node files into a dict name -> parsed TOML
+def read_source(directory=SOURCE_DIR):
+    nodes, problems = {}, []
+    for filename in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(filename)
+        if ext != '.toml':
+            continue
+        try:
+            with open(os.path.join(directory, filename), 'rb') as f:
+                nodes[name] = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            problems.append(f'{filename}: {e}')
+    if problems:
+        raise FlowchartError(problems)
+    return nodes
+
+
+# check everything that would otherwise only show up as a broken page in the app
+def validate(nodes):
+    problems = []
+    ids = {}
+    for name, node in nodes.items():
+        for key in node.keys() - NODE_KEYS:
+            problems.append(f'{name}: unknown key {key!r}')
+        node_id = node.get('id')
+        if not isinstance(node_id, int) or isinstance(node_id, bool):
+            problems.append(f'{name}: id must be an integer')
+        elif node_id in ids:
+            problems.append(f'{name}: id {node_id} is already used by {ids[node_id]}')
+        else:
+            ids[node_id] = name
+        if not isinstance(node.get('label'), str) or not node['label'].strip():
+            problems.append(f'{name}: label must be a non-empty string')
+        if 'technique' in node and (not isinstance(node['technique'], str) or not node['technique'].strip()):
+            problems.append(f'{name}: technique must be a non-empty string')
+
+        targets = set()
+        for i, edge in enumerate(node.get('edges', [])):
+            for key in edge.keys() - EDGE_KEYS:
+                problems.append(f'{name}: edge {i}: unknown key {key!r}')
+            if edge.get('to') not in nodes:
+                problems.append(f'{name}: edge {i} points to unknown node {edge.get("to")!r}')
+            elif edge['to'] in targets:
+                problems.append(f'{name}: more than one edge to {edge["to"]}')
+            targets.add(edge.get('to'))
+            if not isinstance(edge.get('label'), str) or not edge['label'].strip():
+                problems.append(f'{name}: edge {i}: label must be a non-empty string')
+
+    if START not in nodes:
+        problems.append(f'there is no {START!r} node')
+    elif nodes[START].get('id') != 0:
+        problems.append(f'the {START!r} node must have id 0')
+    missing = set(range(len(nodes))) - ids.keys()
+    if missing:
+        problems.append(f'ids must be exactly 0..{len(nodes) - 1}, missing {sorted(missing)}')
+    if problems:
+        raise FlowchartError(problems)
+
+
+def compile_flowchart(directory=SOURCE_DIR, rendered_dir=RENDER_DIR):
+    nodes = read_source(directory)
+    validate(nodes)
+
+    by_id = sorted(nodes.items(), key=lambda item: item[1]['id'])
+    names = [name for name, _ in by_id]
+    labels = [node['label'] for _, node in by_id]
+    techniques = [node.get('technique', '').strip() for _, node in by_id]
+    out_edges = []
+    for name, node in by_id:
+        edges = [(edge['label'], nodes[edge['to']]['id']) for edge in node.get('edges', [])]
+        if name != START:
+            edges.append((RETURN_TO_START, 0))
+        out_edges.append(edges)
+    return CompiledFlowchart.from_lists(names, labels, out_edges, techniques=techniques,
+                                        paths=analyse(out_edges, techniques, RETURN_TO_START),
+                                        index=build_index(labels, out_edges, techniques, RETURN_TO_START),
+                                        render=lambda label, inline: read_rendered(label, rendered_dir),
+                                        source_digest=source_digest(directory))
+
+
+def write_cache(chart, path=CACHE_PATH):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(chart.dumps())
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile the ODE flowchart source for the app.')
+    parser.add_argument('-o', '--output', default=CACHE_PATH, help=f'output path (default: {CACHE_PATH})')
+    parser.add_argument('--check', action='store_true', help='only validate the source, do not write anything')
+    parser.add_argument('--strict', action='store_true', help='treat the warnings of the graph analysis as errors')
+    args = parser.parse_args(argv)
+
+    try:
+        chart = compile_flowchart()
+    except FlowchartError as e:
+        sys.exit(str(e))
+    warnings = find_problems(chart, RETURN_TO_START)
+    if warnings and args.strict:
+        sys.exit(str(FlowchartError(warnings)))
+    for warning in warnings:
+        print(f'warning: {warning}', file=sys.stderr)
+    if args.check:
+        print(f'{len(chart)} nodes and {chart.num_edges()} edges, {len(warnings) or "no"} warnings')
+        return
+    write_cache(chart, args.output)
+    print(f'wrote {len(chart)} nodes and {chart.num_edges()} edges to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
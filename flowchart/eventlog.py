@@ -0,0 +1,261 @@
+import argparse
+import atexit
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+# opt-in log of the way users walk through the flowchart, for finding out which answers they take and
+# where they give up. set ODE_EVENT_LOG to the path of the log file to switch it on.
+#
+# every move is one record of RECORD: a random per-session id, the kind of move, the nodes it went from
+# and to, and the time. record() only packs it into a ring buffer in memory, so a click costs about a
+# microsecond and never waits for the disk; a background thread appends the buffer to the file in
+# batches, every FLUSH_INTERVAL seconds or as soon as it is half full. if the disk falls behind for
+# longer than the buffer lasts, the oldest records are dropped (and counted) rather than blocking.
+# when switched off, record() returns right away.
+#
+# the file is a HEADER followed by the records, and is only ever appended to, with one write per batch -
+# several app processes can share it. it is created with its header in one go, so a process never sees
+# it without one. on disk, every record is framed by SYNC and a CRC-32 of it (FRAME): a write cut short
+# by a crash leaves a partial record, which the records other processes append later do not line up
+# with, and readers skip it by looking for the next frame that checks out. the report streams through
+# the file, see report() and
+#   python -m flowchart.eventlog [log file] [--json]
+
+PATH = os.environ.get('ODE_EVENT_LOG') or None
+ENABLED = PATH is not None
+
+CAPACITY = 65536
+FLUSH_INTERVAL = 1.0
+
+MAGIC = b'ODEL'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sII')
+# session id, kind, from, to, unix time
+RECORD = struct.Struct('<8sBHHd')
+# SYNC, the record, its CRC-32
+SYNC = b'\xa5\x5a'
+FRAME = struct.Struct(f'<2s{RECORD.size}sI')
+
+# kinds of move: a session starting (from and to are where it starts), answering, going back, and
+# jumping (search, classifier, the technique list)
+START, ANSWER, BACK, JUMP = range(4)
+KINDS = ('start', 'answer', 'back', 'jump')
+
+
+def session_id():
+    return os.urandom(8)
+
+
+class EventBuffer:
+    __slots__ = ('_data', 'capacity', '_start', '_length', 'dropped', '_lock')
+
+    # a ring buffer of capacity packed records. appending never allocates
+    def __init__(self, capacity=CAPACITY):
+        self._data = bytearray(RECORD.size * capacity)
+        self.capacity = capacity
+        self._start = 0
+        self._length = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._length
+
+    # returns the number of records waiting
+    def append(self, session, kind, source, target, timestamp):
+        with self._lock:
+            if self._length == self.capacity:
+                self._start = (self._start + 1) % self.capacity
+                self.dropped += 1
+            else:
+                self._length += 1
+            end = (self._start + self._length - 1) % self.capacity
+            RECORD.pack_into(self._data, end * RECORD.size, session, kind, source, target, timestamp)
+            return self._length
+
+    # take out all records, as one bytes object in order
+    def drain(self):
+        with self._lock:
+            start, length = self._start, self._length
+            self._start = self._length = 0
+            first = min(length, self.capacity - start)
+            return (bytes(self._data[start * RECORD.size:(start + first) * RECORD.size])
+                    + bytes(self._data[:(length - first) * RECORD.size]))
+
+
+_buffer = EventBuffer()
+_wake = threading.Event()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+# open path for appending. a new file is written with its header under a temporary name and linked
+# into place, so that of several processes starting a log at once, one creates it and the others use it
+def open_log(path):
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, FRAME.size)
+    if not os.path.exists(path):
+        fd, temporary = tempfile.mkstemp(prefix='.eventlog-', dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                os.fchmod(f.fileno(), 0o644)
+            os.link(temporary, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temporary)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    with open(path, 'rb') as f:
+        if f.read(HEADER.size) != header:
+            os.close(fd)
+            raise ValueError(f'{path} is not an event log of version {FORMAT_VERSION}')
+    return fd
+
+
+# the records of data, packed back to back as RECORD, each in its FRAME
+def frame(data):
+    framed = bytearray(len(data) // RECORD.size * FRAME.size)
+    for i in range(len(data) // RECORD.size):
+        record = data[i * RECORD.size:(i + 1) * RECORD.size]
+        FRAME.pack_into(framed, i * FRAME.size, SYNC, record, zlib.crc32(record))
+    return framed
+
+
+def _write(fd):
+    data = _buffer.drain()
+    if data:
+        os.write(fd, frame(data))
+
+
+def _run(path):
+    try:
+        fd = open_log(path)
+    except (OSError, ValueError) as e:
+        print(f'event log not written to {path}: {e}', file=sys.stderr)
+        return
+    atexit.register(_write, fd)
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            _write(fd)
+        except OSError as e:
+            print(f'event log write to {path} failed: {e}', file=sys.stderr)
+
+
+def _start():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_run, args=(PATH,), name='ode-eventlog', daemon=True)
+            _writer.start()
+
+
+# log one move of a session. does nothing if the log is off
+def record(session, kind, source, target):
+    if not ENABLED:
+        return
+    if _writer is None:
+        _start()
+    if _buffer.append(session, kind, source, target, time.time()) * 2 >= _buffer.capacity:
+        _wake.set()
+
+
+# the records of a log file, in order, reading chunk records at a time
+def read_records(path, chunk=65536):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return
+        magic, version, size = HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION or size != FRAME.size:
+            raise ValueError(f'{path} is not an event log of version {FORMAT_VERSION}')
+        data = b''
+        while True:
+            more = f.read(chunk * FRAME.size)
+            data += more
+            position = 0
+            while True:
+                whole = (len(data) - position) // FRAME.size * FRAME.size
+                for sync, record, crc in FRAME.iter_unpack(memoryview(data)[position:position + whole]):
+                    if sync != SYNC or zlib.crc32(record) != crc:
+                        break
+                    yield RECORD.unpack(record)
+                    position += FRAME.size
+                else:
+                    break
+                # a partial record, the end of a write that was cut short: go on from the next frame.
+                # the last byte might be the start of one that goes on in the next chunk
+                position = data.find(SYNC, position + 1)
+                if position < 0:
+                    position = max(0, len(data) - 1)
+                    break
+            if not more:
+                return
+            data = data[position:]
+
+
+# the counts of the log at path: how often every (from, to, kind) move was made, how often each node
+# was reached, and at how many nodes sessions were last seen. memory grows with the number of
+# sessions and distinct moves, not with the length of the log
+def report(path):
+    moves = {}
+    visits = {}
+    last = {}
+    records = 0
+    for session, kind, source, target, _ in read_records(path):
+        records += 1
+        if kind != START:
+            moves[source, target, kind] = moves.get((source, target, kind), 0) + 1
+        visits[target] = visits.get(target, 0) + 1
+        last[session] = target
+    dropped = {}
+    for node in last.values():
+        dropped[node] = dropped.get(node, 0) + 1
+    return {'records': records, 'sessions': len(last), 'moves': moves, 'visits': visits, 'last_seen': dropped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report on the moves recorded in an event log of the app.')
+    parser.add_argument('path', nargs='?', default=PATH, help='the log file (default: $ODE_EVENT_LOG)')
+    parser.add_argument('--top', type=int, default=20, help='rows of each table (default: 20)')
+    parser.add_argument('--json', action='store_true', help='print the full counts as JSON')
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error('no log file given, and ODE_EVENT_LOG is not set')
+
+    counts = report(args.path)
+    if args.json:
+        print(json.dumps({
+            'records': counts['records'],
+            'sessions': counts['sessions'],
+            'moves': [{'from': source, 'to': target, 'kind': KINDS[kind], 'count': count}
+                      for (source, target, kind), count in sorted(counts['moves'].items())],
+            'visits': dict(sorted(counts['visits'].items())),
+            'last_seen': dict(sorted(counts['last_seen'].items())),
+        }, indent=1))
+        return
+
+    from . import load_flowchart
+    chart = load_flowchart()
+
+    def name(node):
+        return chart.names[node] if node < len(chart) else f'#{node}'
+
+    print(f"{counts['records']} moves in {counts['sessions']} sessions\n")
+    print('most frequent moves')
+    for (source, target, kind), count in sorted(counts['moves'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{count:8}  {KINDS[kind]:6}  {name(source)} -> {name(target)}')
+    print('\nwhere sessions were last seen (share of the visits to that node)')
+    for node, count in sorted(counts['last_seen'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{count:8}  {count / counts['visits'][node]:6.0%}  {name(node)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import json
+import os
+
+import networkx as nx
+
+from .compiler import compile_flowchart
+
+# export renderings of the full flowchart to disk, e.g. for documentation or debugging
+# run as
+#   python -m flowchart.export [output directory]
+# artifacts are only rewritten if the nodes or edges changed since the last export
+
+MANIFEST = 'manifest.json'
+
+
+# plain nested lists of the nodes and edges, sorted so that they do not depend on insertion order
+def graph_data(chart):
+    nodes = [[node, chart.label(node)] for node in range(len(chart))]
+    edges = sorted([node, tail, label] for node in range(len(chart)) for label, tail in chart.out_edges(node))
+    return {'nodes': nodes, 'edges': edges}
+
+
+# hash of everything that is shown in the app - if this is unchanged, so are all renderings
+def content_hash(chart):
+    canonical = json.dumps(graph_data(chart), ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def to_networkx(chart):
+    G = nx.DiGraph()
+    for node in range(len(chart)):
+        G.add_node(node, label=chart.label(node))
+    for node in range(len(chart)):
+        for label, tail in chart.out_edges(node):
+            G.add_edge(node, tail, label=label)
+    return G
+
+
+def write_dot(chart, path):
+    nx.nx_agraph.write_dot(to_networkx(chart), path)
+
+
+def write_svg(chart, path):
+    A = nx.nx_agraph.to_agraph(to_networkx(chart))
+    A.draw(path, format='svg', prog='dot')
+
+
+def write_json(chart, path):
+    data = graph_data(chart)
+    data['hash'] = content_hash(chart)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+WRITERS = {
+    'graph.dot': write_dot,
+    'graph.svg': write_svg,
+    'graph.json': write_json,
+}
+
+
+def read_manifest(outdir):
+    try:
+        with open(os.path.join(outdir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# write all artifacts whose recorded hash differs from the current one, returns the names of those written
+def export(chart, outdir, force=False):
+    os.makedirs(outdir, exist_ok=True)
+    digest = content_hash(chart)
+    manifest = read_manifest(outdir)
+
+    written = []
+    for name, writer in WRITERS.items():
+        path = os.path.join(outdir, name)
+        if not force and manifest.get(name) == digest and os.path.exists(path):
+            continue
+        # write next to the target and move into place, so readers never see half an artifact
+        tmp = path + '.tmp'
+        writer(chart, tmp)
+        os.replace(tmp, path)
+        manifest[name] = digest
+        written.append(name)
+
+    if written:
+        tmp = os.path.join(outdir, MANIFEST + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(outdir, MANIFEST))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export DOT, SVG and JSON renderings of the ODE flowchart.')
+    parser.add_argument('outdir', nargs='?', default='build', help='output directory (default: build)')
+    parser.add_argument('--force', action='store_true', help='rewrite all artifacts even if unchanged')
+    args = parser.parse_args(argv)
+
+    written = export(compile_flowchart(), args.outdir, force=args.force)
+    if written:
+        print(f"wrote {', '.join(written)} to {args.outdir}")
+    else:
+        print(f'{args.outdir} is up to date')
+
+
+if __name__ == '__main__':
+    main()
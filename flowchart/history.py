@@ -0,0 +1,110 @@
+import base64
+from array import array
+
+# a session's navigation history, and its compact encoding for the URL query string, so that a session
+# can be restored on any server replica and deep links to a node work
+#
+# the node ids are written as unsigned LEB128 varints (one byte each for ids below 128) and the bytes
+# are base64url-encoded without padding. only the most recent MAX_HISTORY entries are kept.
+
+MAX_HISTORY = 64
+# the longest token MAX_HISTORY varints of up to 3 bytes (ids below 2**21) can produce
+MAX_TOKEN_LENGTH = (MAX_HISTORY * 3 * 4 + 2) // 3
+
+
+# the history of one session: the nodes visited on the way to the current one, oldest first.
+# it lives in a fixed-size ring buffer of uint16, so it never grows past capacity entries - once full,
+# the oldest entry is dropped. popping is O(1), pushing at most one scan of the buffer, and neither allocates.
+# revisiting a node that is still in the history (e.g. via 'return to start') cuts the history back to
+# that visit instead of recording the cycle, so going back from there leads to where it was first reached.
+class NodeHistory:
+    __slots__ = ('_buffer', '_start', '_length')
+
+    def __init__(self, nodes=(0,), capacity=MAX_HISTORY):
+        self._buffer = array('H', bytes(2 * capacity))
+        self._start = 0
+        self._length = 0
+        for node in nodes:
+            self.push(node)
+        if not self._length:
+            raise ValueError('a history needs at least one node')
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        capacity = len(self._buffer)
+        for i in range(self._length):
+            yield self._buffer[(self._start + i) % capacity]
+
+    def __repr__(self):
+        return f'NodeHistory({list(self)})'
+
+    @property
+    def current(self):
+        return self._buffer[(self._start + self._length - 1) % len(self._buffer)]
+
+    # the node before the current one, None if there is none
+    @property
+    def previous(self):
+        if self._length < 2:
+            return None
+        return self._buffer[(self._start + self._length - 2) % len(self._buffer)]
+
+    def push(self, node):
+        capacity = len(self._buffer)
+        for i in range(self._length - 1, -1, -1):
+            if self._buffer[(self._start + i) % capacity] == node:
+                self._length = i + 1
+                return
+        if self._length == capacity:
+            self._start = (self._start + 1) % capacity
+        else:
+            self._length += 1
+        self._buffer[(self._start + self._length - 1) % capacity] = node
+
+    # drop the current node and return the previous one. the first node is never dropped
+    def pop(self):
+        if self._length > 1:
+            self._length -= 1
+        return self.current
+
+
+def encode_history(nodes):
+    data = bytearray()
+    for node in list(nodes)[-MAX_HISTORY:]:
+        while node >= 0x80:
+            data.append(node & 0x7f | 0x80)
+            node >>= 7
+        data.append(node)
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b'=').decode('ascii')
+
+
+# decode a token back into a list of node ids. returns None unless it is a valid walk through chart:
+# not too long, only existing nodes, and every step along an edge of the flowchart
+def decode_history(token, chart):
+    if not token or len(token) > MAX_TOKEN_LENGTH:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except ValueError:
+        return None
+
+    nodes, node, shift = [], 0, 0
+    for byte in data:
+        node |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            if shift > 14:
+                return None
+            continue
+        nodes.append(node)
+        node, shift = 0, 0
+    if shift or not nodes or len(nodes) > MAX_HISTORY:
+        return None
+
+    if any(node >= len(chart) for node in nodes):
+        return None
+    if any(tail not in chart.successors(head) for head, tail in zip(nodes, nodes[1:])):
+        return None
+    return nodes
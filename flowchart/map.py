@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import html
+import os
+import shutil
+import subprocess
+import textwrap
+from functools import lru_cache
+
+from . import RENDER_DIR
+
+# a map of the whole flowchart, with the way to the current node highlighted.
+#
+# laying the graph out is slow, so it is done once per content of the map, and the SVG is cached:
+# on disk in RENDER_DIR/map-<engine>-<sha256 of LAYOUT and the DOT source>.svg, written by
+#   python -m flowchart.map
+# and in memory per process. the layout is Graphviz's dot if it is installed, otherwise the simple
+# layered layout below. without a cached file the app lays the map out itself, once.
+#
+# every node is a group with the id node-<id>, and every edge one with the id edge-<from>-<to>, so
+# that highlighting a path is a stylesheet put in front of the cached SVG, and never another layout.
+# the "return to start" edges are left out, as every node has one.
+
+LAYOUT = 'dot/1'
+WRAP = 24
+
+STYLE = '''<style>
+{path} {{ fill: #ffe4e1; stroke: #ff4b4b; }}
+{current} {{ fill: #ff4b4b; stroke: #ff4b4b; }}
+{current_text} {{ fill: white; }}
+{edges} {{ stroke: #ff4b4b; stroke-width: 2; }}
+{heads} {{ fill: #ff4b4b; stroke: #ff4b4b; }}
+</style>'''
+
+
+def title(chart, node):
+    return textwrap.wrap(chart.technique(node) or chart.names[node].replace('_', ' '), WRAP)
+
+
+# the edges of the map, without those back to the start node
+def map_edges(chart):
+    return [(node, target) for node in range(len(chart)) for target in dict.fromkeys(chart.successors(node))
+            if target != 0]
+
+
+def _quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def to_dot(chart):
+    lines = ['digraph flowchart {', 'node [fontname="sans-serif", fontsize=12];']
+    for node in range(len(chart)):
+        shape = 'box' if chart.technique(node) else 'ellipse'
+        lines.append(f'{node} [id="node-{node}", shape={shape}, label={_quote(chr(10).join(title(chart, node)))}];')
+    lines += [f'{node} -> {target} [id="edge-{node}-{target}"];' for node, target in map_edges(chart)]
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+@lru_cache(maxsize=4)
+def _source(chart):
+    dot = to_dot(chart)
+    return hashlib.sha256(f'{LAYOUT}\0{dot}'.encode('utf-8')).hexdigest(), dot
+
+
+# the layouts, best first: Graphviz's dot, or the one below
+ENGINES = ('dot', 'layered')
+
+
+def engine():
+    return 'dot' if shutil.which('dot') else 'layered'
+
+
+def cache_path(chart, engine, cache_dir=RENDER_DIR):
+    return os.path.join(cache_dir, f'map-{engine}-{_source(chart)[0]}.svg')
+
+
+def layout(chart, engine):
+    if engine == 'dot':
+        return subprocess.run(['dot', '-Tsvg'], input=_source(chart)[1], capture_output=True, text=True,
+                              check=True, timeout=60).stdout
+    return layered_svg(chart)
+
+
+@lru_cache(maxsize=4)
+def _cached(key, cache_dir, chart):
+    for name in ENGINES:
+        try:
+            with open(cache_path(chart, name, cache_dir), encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            pass
+    return layout(chart, engine())
+
+
+# the SVG of the whole map, from the cache if it has been laid out before
+def map_svg(chart, cache_dir=RENDER_DIR):
+    return _cached(_source(chart)[0], cache_dir, chart)
+
+
+# the map with path (the nodes visited, oldest first) highlighted, and its last node marked as the current one
+def highlight(svg, path):
+    path = list(path)
+    if not path:
+        return svg
+    shapes = ('ellipse', 'polygon', 'rect')
+    steps = [f'#edge-{a}-{b}' for a, b in zip(path, path[1:])]
+    style = STYLE.format(
+        path=', '.join(f'#node-{node} > {shape}' for node in path[:-1] for shape in shapes) or 'none',
+        current=', '.join(f'#node-{path[-1]} > {shape}' for shape in shapes),
+        current_text=f'#node-{path[-1]} > text',
+        edges=', '.join(f'{step} > path' for step in steps) or 'none',
+        heads=', '.join(f'{step} > polygon' for step in steps) or 'none')
+    # right after the opening tag of the svg element
+    start = svg.index('>', svg.index('<svg')) + 1
+    return svg[:start] + style + svg[start:]
+
+
+# a simple stand-in for dot: the nodes in layers by their distance from the start, ordered within a
+# layer to keep edges short (barycentre heuristic), edges as curves from the bottom of a node to the
+# top of the next (or back up)
+def layered_svg(chart, sweeps=4):
+    n = len(chart)
+    deepest = max((chart.depth(node) or 0) for node in range(n))
+    layer = [chart.depth(node) if chart.depth(node) is not None else deepest + 1 for node in range(n)]
+    edges = map_edges(chart)
+    neighbours = [[] for _ in range(n)]
+    for node, target in edges:
+        neighbours[node].append(target)
+        neighbours[target].append(node)
+    layers = [[] for _ in range(max(layer) + 1)]
+    for node in range(n):
+        layers[layer[node]].append(node)
+    position = {node: i for nodes in layers for i, node in enumerate(nodes)}
+    for sweep in range(sweeps):
+        for nodes in layers if sweep % 2 == 0 else reversed(layers):
+            def barycentre(node):
+                # neighbours in the layers already placed in this sweep
+                placed = [position[other] for other in neighbours[node]
+                          if (layer[other] < layer[node]) == (sweep % 2 == 0) and layer[other] != layer[node]]
+                return sum(placed) / len(placed) if placed else position[node]
+            nodes.sort(key=barycentre)
+            position.update((node, i) for i, node in enumerate(nodes))
+
+    lines = {node: title(chart, node) for node in range(n)}
+    width = {node: 7 * max(map(len, lines[node])) + 24 for node in range(n)}
+    height = {node: 15 * len(lines[node]) + 14 for node in range(n)}
+    row = max(height.values()) + 40
+    total = max(sum(width[node] + 20 for node in nodes) for nodes in layers)
+    x, y = {}, {}
+    for depth, nodes in enumerate(layers):
+        left = (total - sum(width[node] + 20 for node in nodes)) / 2
+        for node in nodes:
+            x[node], y[node] = left + width[node] / 2 + 10, depth * row + row / 2
+            left += width[node] + 20
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{total:.0f}" height="{len(layers) * row}" '
+             f'viewBox="0 0 {total:.0f} {len(layers) * row}" font-family="sans-serif" font-size="12">']
+    for node, target in edges:
+        # which side of the nodes the edge leaves and enters by: +1 the bottom, -1 the top
+        if y[target] > y[node]:
+            leave, enter = 1, -1
+        elif y[target] < y[node]:
+            leave, enter = -1, 1
+        else:
+            leave, enter = -1, -1
+        x1, y1 = x[node], y[node] + leave * height[node] / 2
+        x2, y2 = x[target], y[target] + enter * height[target] / 2
+        bend = max(30, abs(y2 - y1) / 2)
+        base = y2 + enter * 8
+        parts.append(f'<g id="edge-{node}-{target}" class="edge">'
+                     f'<path fill="none" stroke="black" d="M{x1:.1f},{y1:.1f} C{x1:.1f},{y1 + leave * bend:.1f} '
+                     f'{x2:.1f},{y2 + enter * bend:.1f} {x2:.1f},{base:.1f}"/>'
+                     f'<polygon points="{x2 - 4:.1f},{base:.1f} {x2 + 4:.1f},{base:.1f} {x2:.1f},{y2:.1f}"/>'
+                     '</g>')
+    for node in range(n):
+        w, h = width[node], height[node]
+        if chart.technique(node):
+            shape = f'<rect x="{x[node] - w / 2:.1f}" y="{y[node] - h / 2:.1f}" width="{w}" height="{h}" fill="white" stroke="black"/>'
+        else:
+            shape = f'<ellipse cx="{x[node]:.1f}" cy="{y[node]:.1f}" rx="{w / 2}" ry="{h / 2}" fill="white" stroke="black"/>'
+        top = y[node] - 15 * (len(lines[node]) - 1) / 2 + 4
+        text = ''.join(f'<tspan x="{x[node]:.1f}" y="{top + 15 * i:.1f}">{html.escape(line)}</tspan>'
+                       for i, line in enumerate(lines[node]))
+        parts.append(f'<g id="node-{node}" class="node">{shape}<text text-anchor="middle">{text}</text></g>')
+    parts.append('</svg>')
+    return '\n'.join(parts) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lay out the map of the ODE flowchart and cache it as SVG.')
+    parser.add_argument('--force', action='store_true', help='lay the map out again even if it is cached')
+    args = parser.parse_args(argv)
+
+    from .compiler import compile_flowchart
+    chart = compile_flowchart()
+    name = engine()
+    path = cache_path(chart, name)
+    if os.path.exists(path) and not args.force:
+        print(f'{path} is up to date')
+        return
+    os.makedirs(RENDER_DIR, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(layout(chart, name))
+    os.replace(tmp, path)
+    # the maps of earlier versions of the flowchart, which are committed along with it
+    for filename in os.listdir(RENDER_DIR):
+        if filename.startswith(f'map-{name}-') and filename.endswith('.svg') and filename != os.path.basename(path):
+            os.remove(os.path.join(RENDER_DIR, filename))
+    print(f'wrote {path}' + ('' if name == 'dot' else ' (Graphviz is not installed, so with the simple layered layout)'))
+
+
+if __name__ == '__main__':
+    main()
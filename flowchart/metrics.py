@@ -0,0 +1,158 @@
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# opt-in timing and usage metrics for the app, served in the Prometheus text format on
+#   http://127.0.0.1:$ODE_METRICS_PORT/metrics
+# set ODE_METRICS_PORT to switch them on (and ODE_METRICS_HOST to listen somewhere else).
+# when switched off, span() hands out one shared no-op context manager and the recording functions
+# return right away, so the instrumentation in the app costs next to nothing.
+
+PORT = int(os.environ.get('ODE_METRICS_PORT') or 0)
+HOST = os.environ.get('ODE_METRICS_HOST', '127.0.0.1')
+ENABLED = PORT > 0
+
+# upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+
+
+_lock = threading.Lock()
+_phases = {}        # phase name -> Histogram
+_node_visits = {}   # node -> number of times it was shown
+_node_render = {}   # node -> [total seconds, number of renders]
+_sessions = 0
+_server = None
+
+
+def observe(phase, seconds, node=None):
+    with _lock:
+        histogram = _phases.get(phase)
+        if histogram is None:
+            histogram = _phases[phase] = Histogram()
+        histogram.observe(seconds)
+        if node is not None:
+            total = _node_render.setdefault(node, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+
+class _Span:
+    __slots__ = ('phase', 'node', 'start')
+
+    def __init__(self, phase, node):
+        self.phase = phase
+        self.node = node
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.phase, time.perf_counter() - self.start, self.node)
+
+
+_NULL_SPAN = nullcontext()
+
+
+# time the enclosed block as one phase of a rerun. with node, also count it towards that node's render time
+def span(phase, node=None):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(phase, node)
+
+
+def node_visited(node):
+    if not ENABLED:
+        return
+    with _lock:
+        _node_visits[node] = _node_visits.get(node, 0) + 1
+
+
+def session_started():
+    global _sessions
+    if not ENABLED:
+        return
+    with _lock:
+        _sessions += 1
+
+
+def render():
+    lines = []
+    with _lock:
+        lines += ['# HELP ode_phase_seconds Time spent in each phase of a rerun.',
+                  '# TYPE ode_phase_seconds histogram']
+        for phase, histogram in sorted(_phases.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'ode_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+            lines.append(f'ode_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'ode_phase_seconds_sum{{phase="{phase}"}} {histogram.sum}')
+            lines.append(f'ode_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+
+        lines += ['# HELP ode_node_visits_total Number of times each node was shown.',
+                  '# TYPE ode_node_visits_total counter']
+        lines += [f'ode_node_visits_total{{node="{node}"}} {count}' for node, count in sorted(_node_visits.items())]
+
+        lines += ['# HELP ode_node_render_seconds Time spent rendering each node.',
+                  '# TYPE ode_node_render_seconds summary']
+        for node, (total, count) in sorted(_node_render.items()):
+            lines.append(f'ode_node_render_seconds_sum{{node="{node}"}} {total}')
+            lines.append(f'ode_node_render_seconds_count{{node="{node}"}} {count}')
+
+        lines += ['# HELP ode_sessions_total Number of sessions started.',
+                  '# TYPE ode_sessions_total counter',
+                  f'ode_sessions_total {_sessions}']
+    return '\n'.join(lines) + '\n'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# start the metrics endpoint in a background thread, once per process. does nothing if metrics are off
+def serve():
+    global _server
+    if not ENABLED:
+        return
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((HOST, PORT), _Handler)
+        except OSError as e:
+            print(f'metrics endpoint not started on {HOST}:{PORT}: {e}', file=sys.stderr)
+            return
+    threading.Thread(target=_server.serve_forever, name='ode-metrics', daemon=True).start()
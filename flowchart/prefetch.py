@@ -0,0 +1,100 @@
+import html
+import os
+import re
+from functools import lru_cache
+
+# prefetching of the next screen. along with every node, the app sends the pre-rendered labels of the
+# nodes one click away - the targets of its answers, and the node "go back" returns to - hidden in the
+# page. clicking an answer shows its label in the browser at once, and greys out the old answers,
+# while the rerun that really moves there is on its way; when the rerun arrives, the element is
+# replaced, which undoes all of that.
+#
+# the answer buttons have the keys edge_key(i) and BACK_KEY, which Streamlit turns into st-key-...
+# classes for the script to find them by. the label is in a container with the key LABEL_KEY, and a
+# node's tool in one with TOOL_KEY, so that both can be hidden while the next label is shown.
+#
+# the script also measures the latency users see: every click is recorded in window.odeClickTimings
+# (and logged with console.debug) with the milliseconds until the prefetched label was painted
+# (preview, if there was one) and until the server's rerun came in (content).
+# set ODE_PREFETCH=0 to send no labels, and measure the latency without prefetching.
+
+ENABLED = os.environ.get('ODE_PREFETCH', '1') != '0'
+
+LABEL_KEY = 'ode_label'
+TOOL_KEY = 'ode_tool'
+BACK_KEY = 'ode_back'
+
+
+def edge_key(index):
+    return f'ode_edge_{index}'
+
+
+STYLE = '''<style>
+.ode-preview:not(.active) { display: none; }
+[data-testid="stElementContainer"]:has(.ode-preview:not(.active)) { display: none; }
+body:has(.ode-preview.active) .st-key-ode_label, body:has(.ode-preview.active) .st-key-ode_tool { display: none; }
+body:has(.ode-preview.active) [class*="st-key-ode_edge_"], body:has(.ode-preview.active) .st-key-ode_back {
+  opacity: 0.4; pointer-events: none; }
+.ode-preview .ode-to-go { opacity: 0.6; font-size: 0.875rem; }
+</style>'''
+
+# runs whenever the element changes, i.e. once per node shown. the click listener is installed once per page
+SCRIPT = '''<script>
+(() => {
+  const root = document.currentScript.closest('.ode-prefetch');
+  const timings = window.odeClickTimings = window.odeClickTimings || [];
+  const click = window.odePendingClick;
+  if (click && click.from !== root.dataset.node) {
+    click.content = performance.now() - click.start;
+    window.odePendingClick = null;
+    timings.push(click);
+    console.debug('ode click', click);
+  }
+  window.odePrefetchRoot = root;
+  if (window.odeClickListener) return;
+  window.odeClickListener = event => {
+    const button = event.target.closest('[class*="st-key-ode_edge_"], .st-key-ode_back');
+    const root = window.odePrefetchRoot;
+    if (!button || !root || !root.isConnected) return;
+    const key = [...button.classList].find(name => name.startsWith('st-key-ode_')).slice(7);
+    const template = root.querySelector(`[data-key="${key}"]`);
+    const click = window.odePendingClick = {from: root.dataset.node, to: key, start: performance.now(),
+                                            prefetched: !!template};
+    if (!template) return;
+    const preview = root.querySelector('.ode-preview');
+    preview.innerHTML = template.innerHTML;
+    preview.classList.add('active');
+    requestAnimationFrame(() => { click.preview = performance.now() - click.start; });
+  };
+  document.addEventListener('click', window.odeClickListener, true);
+})();
+</script>'''
+
+
+# a label that has not been pre-rendered, as escaped text in paragraphs - its markdown and math as they
+# are, until the rerun shows it properly
+def _plain(text):
+    return ''.join(f'<p>{html.escape(paragraph)}</p>' for paragraph in re.split(r'\n\s*\n', text.strip()))
+
+
+def _content(chart, node):
+    label = chart.label_html(node) or _plain(chart.label(node))
+    to_go = chart.questions_to_go(node)
+    if to_go:
+        label += f'<p class="ode-to-go">{to_go} question{"s" if to_go > 1 else ""} to go</p>'
+    return label
+
+
+# the element for node: the script, and the labels of the nodes its answers lead to and of back (the
+# node "go back" leads to, None if there is none). labels that have not been pre-rendered are sent
+# as plain text. the same for every visit, so it is built once
+@lru_cache(maxsize=1024)
+def prefetch_html(chart, node, back=None, enabled=True):
+    targets = [(edge_key(i), target) for i, (_, target) in enumerate(chart.out_edges(node))]
+    if back is not None:
+        targets.append((BACK_KEY, back))
+    templates = []
+    for key, target in targets if enabled else ():
+        templates.append(f'<div hidden data-key="{key}">{_content(chart, target)}</div>')
+    return (f'<div class="ode-prefetch" data-node="{node}">{STYLE}<div class="ode-preview"></div>'
+            + ''.join(templates) + SCRIPT + '</div>')
@@ -0,0 +1,134 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+from . import RENDER_DIR
+
+# pre-render node and edge labels (markdown with $...$ / $$...$$ math) to static HTML, so that the
+# browser does not have to typeset them after every click
+# run as
+#   python -m flowchart.prerender
+# after editing the flowchart. this needs the packages in requirements-export.txt.
+#
+# math is converted to MathML, which current browsers render natively - no client-side typesetting
+# library, stylesheet or font download involved. the markdown around it goes through a CommonMark
+# renderer, like Streamlit's own markdown.
+#
+# results are stored in a content-addressed cache: RENDER_DIR/<sha256 of RENDERER and label>.html. the
+# compiler picks them up from there and embeds them in the compiled flowchart; labels without a cache
+# entry are shown as plain markdown by the app. bump RENDERER whenever the output would change for
+# the same input, so that the cache is invalidated.
+#
+# the cache is committed along with the compiled flowchart, since the app's deployment has neither the
+# packages to render labels nor a build step to run this. entries no label uses any more are removed.
+
+RENDERER = 'markdown-it+latex2mathml/1'
+
+MATH = re.compile(r'\$\$((?s:.+?))\$\$|\$([^$\n]+?)\$')
+PLACEHOLDER = 'MATHPLACEHOLDER{}X'
+
+
+def cache_key(text):
+    return hashlib.sha256(f'{RENDERER}\0{text}'.encode('utf-8')).hexdigest()
+
+
+def cache_path(text, cache_dir=RENDER_DIR):
+    return os.path.join(cache_dir, cache_key(text) + '.html')
+
+
+# pre-rendered HTML for text, or None if there is none yet
+def read_rendered(text, cache_dir=RENDER_DIR):
+    try:
+        with open(cache_path(text, cache_dir), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+# render one label. inline=True drops the surrounding paragraph, for edge labels that end up inside a
+# link or button. raises ValueError if the label contains an unmatched $
+def render(text, inline=False):
+    from latex2mathml.converter import convert
+    from markdown_it import MarkdownIt
+
+    formulas = []
+
+    def stash(match):
+        display = match.group(1) is not None
+        tex = match.group(1) if display else match.group(2)
+        formulas.append(convert(tex.strip(), display='block' if display else 'inline'))
+        return PLACEHOLDER.format(len(formulas) - 1)
+
+    # swap formulas for placeholders first, so that markdown does not mistake _ or * in them for emphasis
+    stashed = MATH.sub(stash, text)
+    if '$' in stashed:
+        raise ValueError('unmatched $')
+    md = MarkdownIt('commonmark')
+    html = md.renderInline(stashed) if inline else md.render(stashed)
+    return re.sub(PLACEHOLDER.format(r'(\d+)'), lambda match: formulas[int(match.group(1))], html)
+
+
+def write_rendered(text, html, cache_dir=RENDER_DIR):
+    path = cache_path(text, cache_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(tmp, path)
+
+
+# render every label of chart that is not in the cache yet. returns the number of labels rendered and
+# a list of problems with labels that could not be rendered
+def prerender(chart, cache_dir=RENDER_DIR, force=False):
+    os.makedirs(cache_dir, exist_ok=True)
+    texts = [(chart.label(node), False, chart.names[node]) for node in range(len(chart))]
+    texts += [(label, True, f'edge label {label!r}') for label in chart.edge_labels]
+
+    rendered, problems = 0, []
+    for text, inline, where in texts:
+        if not force and os.path.exists(cache_path(text, cache_dir)):
+            continue
+        try:
+            html = render(text, inline=inline)
+        except Exception as e:
+            problems.append(f'{where}: {e}')
+            continue
+        write_rendered(text, html, cache_dir)
+        rendered += 1
+    return rendered, problems
+
+
+# remove the cached labels that are not labels of chart any more. returns how many were removed
+def prune(chart, cache_dir=RENDER_DIR):
+    keep = {cache_key(chart.label(node)) + '.html' for node in range(len(chart))}
+    keep |= {cache_key(label) + '.html' for label in chart.edge_labels}
+    removed = 0
+    for filename in os.listdir(cache_dir):
+        if filename.endswith('.html') and filename not in keep:
+            os.remove(os.path.join(cache_dir, filename))
+            removed += 1
+    return removed
+
+
+def main(argv=None):
+    from .compiler import compile_flowchart, write_cache
+
+    parser = argparse.ArgumentParser(description='Pre-render the labels of the ODE flowchart to HTML.')
+    parser.add_argument('--force', action='store_true', help='re-render labels that are already cached')
+    args = parser.parse_args(argv)
+
+    chart = compile_flowchart()
+    rendered, problems = prerender(chart, force=args.force)
+    print(f'rendered {rendered} labels to {RENDER_DIR}, removed {prune(chart)} that are no longer used')
+    for problem in problems:
+        print(f'could not render {problem}', file=sys.stderr)
+
+    # recompile, so that the new HTML ends up in the compiled flowchart
+    chart = compile_flowchart()
+    write_cache(chart)
+    print(f'recompiled the flowchart with {chart.rendered_count()} of {len(chart)} node labels pre-rendered')
+
+
+if __name__ == '__main__':
+    main()
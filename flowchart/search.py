@@ -0,0 +1,106 @@
+import math
+import re
+from bisect import bisect_left
+
+from .prerender import MATH
+
+# full-text search over the flowchart, so that users can go straight to a node instead of clicking
+# through all the questions before it
+#
+# the inverted index is built by the compiler and stored with the compiled flowchart: the sorted
+# tuple of all terms, and CSR-style for every term the nodes it occurs in with a weight. the text of a
+# node is its technique title, its label, and the labels of the edges leading to it (these say what
+# the node is about: '$F$ is a function of $x$ only' leads to direct integration). math is left out,
+# and words are lowercased and reduced to a crude singular, in the index and in queries alike.
+# a query matches the nodes that contain every one of its words, each as the start of a term, so that
+# partial words already find something; they are ranked by tf-idf.
+
+WORD = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+    a about after all also an and any are as at be but by can do does for from get go has have how i if
+    in into is it its just me more no not now of on one or our over same so some than that the their
+    them then there these they this to up us was we what when where which who will with yes you your
+'''.split())
+
+# how much an occurrence counts in each part of a node's text
+TECHNIQUE_WEIGHT = 4
+EDGE_WEIGHT = 2
+LABEL_WEIGHT = 1
+
+
+def normalise(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+# the normalised search terms in text, with math and stop words dropped
+def terms(text):
+    text = MATH.sub(' ', text.lower())
+    return [normalise(word) for word in WORD.findall(text) if len(word) > 1 and word not in STOPWORDS]
+
+
+# returns the index tables (terms, indptr, nodes, weights): the postings of terms[t] are the entries
+# indptr[t]:indptr[t+1] of nodes and weights, in order of node id
+def build_index(labels, out_edges, techniques, return_label):
+    postings = {}
+
+    def add(node, text, weight):
+        for term in terms(text):
+            nodes = postings.setdefault(term, {})
+            nodes[node] = nodes.get(node, 0) + weight
+
+    for node, (label, technique) in enumerate(zip(labels, techniques)):
+        add(node, technique, TECHNIQUE_WEIGHT)
+        add(node, label, LABEL_WEIGHT)
+    for edges in out_edges:
+        for reply, target in edges:
+            if reply != return_label:
+                add(target, reply, EDGE_WEIGHT)
+
+    index_terms = tuple(sorted(postings))
+    indptr, nodes, weights = [0], [], []
+    for term in index_terms:
+        for node, weight in sorted(postings[term].items()):
+            nodes.append(node)
+            weights.append(min(weight, 0xffff))
+        indptr.append(len(nodes))
+    return index_terms, indptr, nodes, weights
+
+
+# the reachable nodes matching query, best first. at most limit of them
+def search(chart, query, limit=10):
+    scores = None
+    for word in dict.fromkeys(terms(query)):
+        # every term the word is a prefix of
+        matches = {}
+        t = bisect_left(chart.index_terms, word)
+        while t < len(chart.index_terms) and chart.index_terms[t].startswith(word):
+            start, end = chart.index_indptr[t], chart.index_indptr[t + 1]
+            idf = math.log(1 + len(chart) / (end - start))
+            for i in range(start, end):
+                node = chart.index_nodes[i]
+                matches[node] = max(matches.get(node, 0), chart.index_weights[i] * idf)
+            t += 1
+        if scores is None:
+            scores = matches
+        else:
+            scores = {node: score + matches[node] for node, score in scores.items() if node in matches}
+        if not scores:
+            return []
+    if not scores:
+        return []
+    found = [node for node in scores if chart.depth(node) is not None]
+    found.sort(key=lambda node: (-scores[node], not chart.technique(node), chart.depth(node), node))
+    return found[:limit]
+
+
+# a short title for node in search results: its technique, or else the first sentence of its label
+def summary(chart, node):
+    if chart.technique(node):
+        return chart.technique(node)
+    label = chart.label(node).strip()
+    end = re.search(r'(?<=[.?!:])\s|\n\s*\n', label)
+    return ' '.join((label[:end.start()] if end else label).split())
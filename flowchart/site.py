@@ -0,0 +1,97 @@
+import argparse
+import html
+import os
+
+from .compiler import compile_flowchart
+from .prerender import render
+
+# export the whole flowchart as a static website: one pre-rendered HTML page per node, with every
+# outgoing edge as a link to the page of its target. going back is left to the browser's history.
+# the pages need no server-side code at all, so they can be served from any file server or CDN.
+# run as
+#   python -m flowchart.site [output directory]
+# pages whose content has not changed are left untouched, so that their caches stay valid.
+
+TITLE = "So you've got this ODE ..."
+COMMENTS_URL = 'https://cosmorobb.science'
+
+PAGE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 46rem; margin: 2rem auto; padding: 0 1rem; line-height: 1.5; }}
+h1 {{ border-bottom: 3px solid; border-image: linear-gradient(to right, red, orange, yellow, green, blue, violet) 1; }}
+nav a, nav button {{ display: block; box-sizing: border-box; width: 100%; margin: 0.5rem 0; padding: 0.5rem;
+  border: 1px solid #ccc; border-radius: 0.5rem; background: none; color: inherit; font: inherit;
+  text-align: center; text-decoration: none; cursor: pointer; }}
+nav a:hover, nav button:hover {{ border-color: red; color: red; }}
+nav [hidden] {{ display: none; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{label}
+<nav>
+{links}
+<button type="button" id="back" hidden onclick="history.back()">go back</button>
+</nav>
+<p><a href="{comments}">Comments? Find me and tell me!</a></p>
+<script>
+if (history.length > 1) document.getElementById('back').hidden = false;
+</script>
+</body>
+</html>
+'''
+
+
+def page_name(node):
+    return 'index.html' if node == 0 else f'node-{node}.html'
+
+
+def render_page(chart, node):
+    label = chart.label_html(node) or render(chart.label(node))
+    edge_html = dict(zip(chart.edge_labels, chart.edge_label_html))
+    links = '\n'.join(
+        f'<a href="{page_name(target)}">{edge_html[reply] or render(reply, inline=True)}</a>'
+        for reply, target in chart.out_edges(node)
+    )
+    return PAGE.format(title=html.escape(TITLE), label=label, links=links, comments=COMMENTS_URL)
+
+
+def write_if_changed(path, content):
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
+
+
+# write one page per node into outdir, returns the number of pages that changed
+def export_site(chart, outdir):
+    os.makedirs(outdir, exist_ok=True)
+    return sum(write_if_changed(os.path.join(outdir, page_name(node)), render_page(chart, node))
+               for node in range(len(chart)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the ODE flowchart as a static website.')
+    parser.add_argument('outdir', nargs='?', default=os.path.join('build', 'site'),
+                        help='output directory (default: build/site)')
+    args = parser.parse_args(argv)
+
+    chart = compile_flowchart()
+    changed = export_site(chart, args.outdir)
+    print(f'{changed} of {len(chart)} pages changed in {args.outdir}')
+
+
+if __name__ == '__main__':
+    main()
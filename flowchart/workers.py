@@ -0,0 +1,193 @@
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+
+# worker processes for work that may have to be cut short, like SymPy on what users type in.
+#
+# a worker runs one call at a time, for one caller only: it is taken out of the idle ones (or started)
+# by checkout(), and handed back by release() once the call is done. a call that takes too long is
+# cut short by kill(), which ends that worker and nothing else - other sessions, with workers of their
+# own, never notice. workers import the modules given to them before they take their first call, so
+# that the time limits of the calls do not include starting Python and importing SymPy.
+#
+# at most MAX_WORKERS run at a time, and at most MAX_IDLE are kept for later.
+
+MAX_WORKERS = max(4, 2 * (os.cpu_count() or 1))
+MAX_IDLE = max(2, os.cpu_count() or 1)
+START_TIMEOUT = 60.0
+
+_main_lock = threading.Lock()
+
+
+# spawned workers (rather than forked: the app's server is multi-threaded) import the main module
+# first, which in the app is the app script itself, so hide it while they start. sys.modules is
+# shared by all the sessions' script threads: the swaps are done one at a time, and the main module
+# is only put back if nobody replaced the stand-in meanwhile (Streamlit does on every rerun)
+@contextmanager
+def hidden_main():
+    with _main_lock:
+        main = sys.modules['__main__']
+        stand_in = types.ModuleType('__main__')
+        sys.modules['__main__'] = stand_in
+        try:
+            yield
+        finally:
+            if sys.modules.get('__main__') is stand_in:
+                sys.modules['__main__'] = main
+
+
+# in the worker: import the modules, then run calls until the connection is closed
+def _serve(connection, modules):
+    for module in modules:
+        importlib.import_module(module)
+    connection.send(None)
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            result = True, function(*args)
+        except Exception as e:
+            result = False, e
+        connection.send(result)
+
+
+class Worker:
+    __slots__ = ('process', 'connection', 'modules')
+
+    def __init__(self, modules):
+        self.modules = modules
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.get_context('spawn').Process(
+            target=_serve, args=(child, modules), name='ode-worker', daemon=True)
+        with hidden_main():
+            self.process.start()
+        child.close()
+        if not self.connection.poll(START_TIMEOUT):
+            self.kill()
+            raise RuntimeError('a worker process did not start')
+        self.connection.recv()
+
+    # start function(*args); its outcome is then ready() and outcome()
+    def submit(self, function, *args):
+        self.connection.send((function, args))
+
+    def ready(self, timeout=0.0):
+        return self.connection.poll(timeout)
+
+    # (True, the return value of the call) or (False, its exception). raises EOFError if the worker died
+    def outcome(self):
+        return self.connection.recv()
+
+    def kill(self):
+        self.connection.close()
+        self.process.kill()
+        self.process.join()
+
+
+_idle = {}
+_idle_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+
+# a worker with modules imported, for the caller alone. waits for a free slot if MAX_WORKERS are busy,
+# or returns None right away if block is false
+def checkout(modules=(), block=True):
+    if not _slots.acquire(block):
+        return None
+    modules = tuple(modules)
+    with _idle_lock:
+        idle = _idle.get(modules)
+        while idle:
+            worker = idle.pop()
+            if worker.process.is_alive():
+                return worker
+            worker.kill()
+    try:
+        return Worker(modules)
+    except BaseException:
+        _slots.release()
+        raise
+
+
+# hand a worker back after its call is done
+def release(worker):
+    with _idle_lock:
+        idle = _idle.setdefault(worker.modules, [])
+        if len(idle) < MAX_IDLE and worker.process.is_alive():
+            idle.append(worker)
+            worker = None
+    if worker is not None:
+        worker.kill()
+    _slots.release()
+
+
+# end a worker whose call is taking too long
+def kill(worker):
+    worker.kill()
+    _slots.release()
+
+
+# run function(*args) on a worker of its own, and wait at most timeout seconds for it. raises its
+# exception, TimeoutError if it takes longer, or EOFError or OSError if the worker died. the worker is
+# killed in all but the first case
+def call(function, args, timeout, modules=()):
+    worker = checkout(modules)
+    try:
+        worker.submit(function, *args)
+        if not worker.ready(timeout):
+            raise TimeoutError
+        ok, value = worker.outcome()
+    except BaseException:
+        kill(worker)
+        raise
+    release(worker)
+    if not ok:
+        raise value
+    return value
+
+
+# run calls, a list of (function, args), on up to parallel workers of their own, and give each
+# timeout seconds from when it starts on a worker. returns their results in order, with the
+# exception for calls that failed (or whose worker died) and TimeoutError() for those that timed out
+def call_all(calls, timeout, modules=(), parallel=MAX_IDLE):
+    waiting = list(enumerate(calls))[::-1]
+    results = [None] * len(calls)
+    running = {}
+    try:
+        while waiting or running:
+            # the first worker is waited for, any more only taken while there are free slots
+            while waiting and len(running) < parallel:
+                worker = checkout(modules, block=not running)
+                if worker is None:
+                    break
+                index, (function, args) = waiting.pop()
+                running[worker.connection] = worker, index, time.monotonic() + timeout
+                worker.submit(function, *args)
+            soonest = min(deadline for _, _, deadline in running.values())
+            for connection in wait(list(running), max(0.0, soonest - time.monotonic())):
+                worker, index, _ = running.pop(connection)
+                try:
+                    _, results[index] = worker.outcome()
+                except (EOFError, OSError) as e:
+                    kill(worker)
+                    results[index] = e
+                else:
+                    release(worker)
+            for connection, (worker, index, deadline) in list(running.items()):
+                if deadline <= time.monotonic() and not worker.ready():
+                    del running[connection]
+                    kill(worker)
+                    results[index] = TimeoutError()
+    finally:
+        for worker, _, _ in running.values():
+            kill(worker)
+    return results
+
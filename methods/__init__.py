@@ -0,0 +1,2 @@
+# numerical, graphical and perturbative methods behind the technique nodes of the flowchart that
+# have no closed-form recipe. these need NumPy, and SymPy to read the user's equation
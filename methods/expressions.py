@@ -0,0 +1,80 @@
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+
+from flowchart.classify import EquationError, parse_safely, x, y
+
+# turn ODEs into NumPy functions that take and return whole arrays at once. equations typed in by the
+# user are parsed like the classifier does it (in a worker, with a time limit), and the compiled
+# functions are cached by text.
+
+
+# the batched right-hand side f(t, y) of the system y_i' = exprs[i], in the form numerical.solve and
+# stiff.solve take it, and the Jacobian blocks jac(t, y) of f, derived symbolically
+def system_functions(exprs, t, variables):
+    F = sp.lambdify((t, *variables), list(exprs), 'numpy')
+    J = sp.lambdify((t, *variables), sp.Matrix(exprs).jacobian(variables).tolist(), 'numpy')
+
+    # constant entries come out as plain numbers, so broadcast everything to the batch
+    def stack(entries, batch):
+        if isinstance(entries, list):
+            return np.stack([stack(entry, batch) for entry in entries], axis=-1)
+        return np.broadcast_to(entries, (batch,))
+
+    def f(t, y):
+        return stack(F(t, *y.T), len(y))
+
+    def jac(t, y):
+        return np.swapaxes(stack(J(t, *y.T), len(y)), 1, 2)
+
+    return f, jac
+
+
+# F of y' = F(x, y), with the names of the constants left in it (sorted), e.g. for a parameter sweep
+@lru_cache(maxsize=256)
+def family(text):
+    order, F = parse_safely(text)
+    if F is None:
+        raise EquationError("that is not of the form y' = F(x, y)")
+    return F, tuple(sorted(symbol.name for symbol in F.free_symbols - {x, y}))
+
+
+# F of y' = F(x, y), for equations of that form with no constants left
+@lru_cache(maxsize=256)
+def rhs_expression(text):
+    F, constants = family(text)
+    if constants:
+        raise EquationError(f"please put in numbers for {', '.join(constants)}")
+    return F
+
+
+# the right-hand side of y' = F(x, y) as a function F(xs, ys) of arrays
+@lru_cache(maxsize=256)
+def rhs_function(text):
+    function = sp.lambdify((x, y), rhs_expression(text), 'numpy')
+    return lambda xs, ys: np.broadcast_to(function(xs, ys), np.broadcast(xs, ys).shape)
+
+
+# y' = F(x, y) as the batched (f, jac) of system_functions
+@lru_cache(maxsize=256)
+def rhs_system(text):
+    return system_functions([rhs_expression(text)], x, [y])
+
+
+# the autonomous system x' = f(x, y), y' = g(x, y), from the texts of its right-hand sides f and g.
+# returns (f, g) as expressions, and as one function of arrays returning both, as graphical.field takes it
+@lru_cache(maxsize=256)
+def plane_system(f_text, g_text):
+    exprs = []
+    for text in (f_text, g_text):
+        if "=" in text or "'" in text:
+            raise EquationError("just the right-hand side, please")
+        exprs.append(rhs_expression(f"y' = {text}"))
+    function = sp.lambdify((x, y), exprs, 'numpy')
+
+    def both(xs, ys):
+        shape = np.broadcast(xs, ys).shape
+        return tuple(np.broadcast_to(component, shape) for component in function(xs, ys))
+
+    return tuple(exprs), both
@@ -0,0 +1,137 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# direction fields of y' = F(x, y), and phase portraits of autonomous systems x' = f(x, y), y' = g(x, y)
+#
+# the plane is cut into tiles, like a web map: at levels (lx, ly) a tile is 2^lx wide and 2^ly high,
+# and tile (i, j) covers [i 2^lx, (i+1) 2^lx] x [j 2^ly, (j+1) 2^ly]. a view is drawn with the tiles of
+# the levels at which MIN_TILES to twice as many of them span it along each axis, every tile with
+# resolution x resolution arrows at the centres of its cells, so that the arrows line up across tiles.
+#
+# tiles are cached by (expression, levels, tile, resolution), with LRU eviction: panning only computes
+# the tiles that come into view, and zooming back reuses the levels seen before. the field of all the
+# tiles a view is missing is evaluated in one vectorised call. while the view is being moved around,
+# the app draws it at PREVIEW resolution first, a quarter of the arrows, which are usually cached already.
+
+MIN_TILES = 2
+RESOLUTION = 8
+PREVIEW = 4
+# about 8 MB at the default resolution
+CACHE_SIZE = 4096
+# the tiles of one view, at most (the view may be much wider than high)
+MAX_TILES = 256
+
+_tiles = OrderedDict()
+_tiles_lock = threading.Lock()
+
+
+def _levels(viewport):
+    x0, x1, y0, y1 = viewport
+    return (math.floor(math.log2((x1 - x0) / MIN_TILES)), math.floor(math.log2((y1 - y0) / MIN_TILES)))
+
+
+# the tile keys (levels, i, j) covering viewport (x0, x1, y0, y1)
+def tiles(viewport):
+    x0, x1, y0, y1 = viewport
+    if not (x0 < x1 and y0 < y1):
+        raise ValueError('the viewport is empty')
+    levels = _levels(viewport)
+    width, height = 2.0 ** levels[0], 2.0 ** levels[1]
+    columns = range(math.floor(x0 / width), math.ceil(x1 / width))
+    rows = range(math.floor(y0 / height), math.ceil(y1 / height))
+    if len(columns) * len(rows) > MAX_TILES:
+        raise ValueError('the viewport is too narrow')
+    return [(levels, i, j) for i in columns for j in rows]
+
+
+# the points of a tile, flattened
+def _points(tile, resolution):
+    (lx, ly), i, j = tile
+    offsets = (np.arange(resolution) + 0.5) / resolution
+    xs, ys = np.meshgrid((i + offsets) * 2.0 ** lx, (j + offsets) * 2.0 ** ly, indexing='ij')
+    return xs.ravel(), ys.ravel()
+
+
+def _cached(key):
+    with _tiles_lock:
+        if key in _tiles:
+            _tiles.move_to_end(key)
+            return _tiles[key]
+    return None
+
+
+def _remember(key, value):
+    with _tiles_lock:
+        _tiles[key] = value
+        while len(_tiles) > CACHE_SIZE:
+            _tiles.popitem(last=False)
+
+
+# whether all tiles of the view are cached
+def is_cached(expression, viewport, resolution=RESOLUTION):
+    with _tiles_lock:
+        return all((expression, tile, resolution) in _tiles for tile in tiles(viewport))
+
+
+# the vector field over viewport (x0, x1, y0, y1), as the flat arrays (x, y, u, v) of the arrows in it.
+# function(xs, ys) returns the components (u, v) at arrays of points, and expression is a hashable key
+# for it - e.g. the canonical form of the expressions it evaluates
+def field(expression, function, viewport, resolution=RESOLUTION):
+    keys = [(expression, tile, resolution) for tile in tiles(viewport)]
+    found = [_cached(key) for key in keys]
+    missing = [key for key, tile in zip(keys, found) if tile is None]
+    if missing:
+        points = [_points(tile, resolution) for _, tile, _ in missing]
+        xs, ys = np.concatenate([p[0] for p in points]), np.concatenate([p[1] for p in points])
+        with np.errstate(all='ignore'):
+            u, v = function(xs, ys)
+        u = np.broadcast_to(np.asarray(u, dtype=float), xs.shape)
+        v = np.broadcast_to(np.asarray(v, dtype=float), xs.shape)
+        per_tile = resolution * resolution
+        computed = {}
+        for n, key in enumerate(missing):
+            part = slice(n * per_tile, (n + 1) * per_tile)
+            tile = np.stack((xs[part], ys[part], u[part], v[part]))
+            tile.setflags(write=False)
+            _remember(key, tile)
+            computed[key] = tile
+        found = [tile if tile is not None else computed[key] for key, tile in zip(keys, found)]
+
+    x, y, u, v = np.concatenate(found, axis=1)
+    x0, x1, y0, y1 = viewport
+    inside = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+    return x[inside], y[inside], u[inside], v[inside]
+
+
+# short line segments (x_from, y_from, x_to, y_to) through the arrows, pointing along them as seen on a
+# chart of the viewport, and all of the same length there: a fraction of the cell they are drawn in.
+# arrows of zero or undefined length are left out
+def segments(x, y, u, v, viewport, resolution=RESOLUTION, length=0.7):
+    x0, x1, y0, y1 = viewport
+    width, height = x1 - x0, y1 - y0
+    levels = _levels(viewport)
+    # the size of a cell, as a fraction of the chart
+    cell = min(2.0 ** levels[0] / width, 2.0 ** levels[1] / height) / resolution
+    with np.errstate(all='ignore'):
+        su, sv = u / width, v / height
+        norm = np.hypot(su, sv)
+        keep = np.isfinite(norm) & (norm > 0)
+        scale = 0.5 * length * cell / norm[keep]
+    dx, dy = su[keep] * scale * width, sv[keep] * scale * height
+    x, y = x[keep], y[keep]
+    return x - dx, y - dy, x + dx, y + dy
+
+
+# the direction field of y' = F(x, y), with F(xs, ys) taking and returning arrays
+def slope_field(F):
+    def function(xs, ys):
+        return np.ones_like(xs), F(xs, ys)
+    return function
+
+
+def clear_cache():
+    with _tiles_lock:
+        _tiles.clear()
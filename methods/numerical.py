@@ -0,0 +1,336 @@
+import numpy as np
+
+# adaptive explicit Runge-Kutta integration of a whole batch of initial value problems at once
+#
+# the method is Dormand-Prince 5(4): seven stages, the last of which is the first of the next step
+# (FSAL), and an embedded 4th-order solution for error control. all trajectories are advanced together,
+# each stage one vectorised call of the right-hand side for the whole batch, but every trajectory has
+# its own time and step size: a step is accepted or rejected per trajectory, and trajectories that
+# have arrived just stop moving. the stage arrays, the work space and the masks of the steps are
+# allocated once per solve and reused by every step: apart from what the right-hand side returns,
+# taking a step (_Integrator.run) allocates nothing that grows with the batch. the output does: solve
+# interpolates, and stream copies out, the trajectories whose step was accepted.
+#
+# solutions are reported on a fixed grid of output times, interpolated within each step by the
+# method's own 4th-order continuous extension, which needs no further evaluations.
+
+# Butcher tableau
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1])
+A = np.array([
+    [0, 0, 0, 0, 0, 0],
+    [1 / 5, 0, 0, 0, 0, 0],
+    [3 / 40, 9 / 40, 0, 0, 0, 0],
+    [44 / 45, -56 / 15, 32 / 9, 0, 0, 0],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729, 0, 0],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656, 0],
+    [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+])
+# weights of the 5th-order solution (the last row of A), and those minus the 4th-order weights
+B = np.append(A[6], 0)
+E = B - np.array([5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40])
+
+# coefficients of the continuous extension: within a step, y(t + theta h) is
+#   y(t) + h sum_s K[s] (P[s, 0] theta + P[s, 1] theta^2 + P[s, 2] theta^3 + P[s, 3] theta^4)
+P = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+
+# accepted steps in a chunk of stream's output
+CHUNK = 256
+
+# status of a trajectory
+RUNNING, DONE, FAILED = 0, 1, 2
+
+
+class BatchSolution:
+    __slots__ = ('t', 'y', 'status', 'steps', 'rejected', 'evaluations', 'jacobians', 'factorisations')
+
+    # t: output times, y: solutions at those times, shape (len(t), batch, dim) - NaN where a trajectory
+    # failed before getting there. status, steps and rejected are per trajectory, the other counts for
+    # the whole solve (jacobians and factorisations only for the implicit methods of stiff.py)
+    def __init__(self, t, y, status, steps, rejected, evaluations, jacobians=0, factorisations=0):
+        self.t = t
+        self.y = y
+        self.status = status
+        self.steps = steps
+        self.rejected = rejected
+        self.evaluations = evaluations
+        self.jacobians = jacobians
+        self.factorisations = factorisations
+
+    def __repr__(self):
+        return (f'BatchSolution({self.y.shape[1]} trajectories, {int((self.status == DONE).sum())} done, '
+                f'{int(self.steps.sum())} steps, {self.evaluations} evaluations)')
+
+
+# root mean square of x / scale over the last axis, into out
+def _rms(x, scale, work, out):
+    np.divide(x, scale, out=work)
+    np.square(work, out=work)
+    np.mean(work, axis=1, out=out)
+    np.sqrt(out, out=out)
+
+
+# the state of an integration: every array of the steps is allocated here once, and reused by every step
+class _Integrator:
+    __slots__ = ('f', 't0', 't_end', 'direction', 'rtol', 'atol', 't', 't_old', 't_stage', 'h', 'hd', 'y', 'K',
+                 'y_new', 'error', 'scale', 'work', 'norm', 'factor', 'running', 'accepted', 'arrived', 'mask',
+                 'status', 'steps', 'rejected', 'evaluations')
+
+    def __init__(self, f, t_span, y0, rtol, atol):
+        self.f = f
+        self.t0, self.t_end = map(float, t_span)
+        self.direction = 1.0 if self.t_end >= self.t0 else -1.0
+        self.rtol, self.atol = rtol, atol
+        self.y = np.array(y0, dtype=float, ndmin=2)
+        batch, dim = self.y.shape
+        self.t = np.full(batch, self.t0)
+        self.t_old = np.empty(batch)
+        self.t_stage = np.empty(batch)
+        self.hd = np.empty((batch, 1))
+        self.K = np.empty((7, batch, dim))
+        self.y_new = np.empty((batch, dim))
+        self.error = np.empty((batch, dim))
+        self.scale = np.empty((batch, dim))
+        self.work = np.empty((batch, dim))
+        self.norm = np.empty(batch)
+        self.factor = np.empty(batch)
+        self.running = np.empty(batch, dtype=bool)
+        self.accepted = np.empty(batch, dtype=bool)
+        self.arrived = np.empty(batch, dtype=bool)
+        self.mask = np.empty(batch, dtype=bool)
+        self.status = np.zeros(batch, dtype=np.int8)
+        self.steps = np.zeros(batch, dtype=np.int64)
+        self.rejected = np.zeros(batch, dtype=np.int64)
+        with np.errstate(all='ignore'):
+            self.K[0] = f(self.t, self.y)
+            self.h = _initial_step(f, self.t, self.y, self.K[0], self.direction, rtol, atol)
+        self.evaluations = 2
+
+    # take steps until every trajectory has arrived or failed. yields the trajectories whose step was
+    # accepted, as a mask, while t_old, t, hd and K describe those steps and y is still at their start.
+    # the work arrays and the mask are overwritten by the next step
+    def run(self, max_steps):
+        f, direction, t_end = self.f, self.direction, self.t_end
+        t, h, hd, y, K, work = self.t, self.h, self.hd, self.y, self.K, self.work
+        # t_stage doubles as scratch space outside the stages
+        scratch, norm, factor = self.t_stage, self.norm, self.factor
+        running, accepted, arrived, mask = self.running, self.accepted, self.arrived, self.mask
+        status = self.status
+        for _ in range(max_steps):
+            np.equal(status, RUNNING, out=running)
+            if not running.any():
+                break
+            with np.errstate(all='ignore'):
+                # do not step past the end, and not at all once there
+                np.subtract(t_end, t, out=scratch)
+                scratch *= direction
+                np.minimum(h, scratch, out=h)
+                np.logical_not(running, out=mask)
+                np.copyto(h, 0.0, where=mask)
+                np.multiply(h, direction, out=hd[:, 0])
+
+                for stage in range(1, 7):
+                    np.einsum('s,sbd->bd', A[stage, :stage], K[:stage], out=work)
+                    work *= hd
+                    work += y
+                    np.multiply(hd[:, 0], C[stage], out=self.t_stage)
+                    self.t_stage += t
+                    K[stage] = f(self.t_stage, work)
+                # the last stage was evaluated at the 5th-order solution
+                np.copyto(self.y_new, work)
+                np.einsum('s,sbd->bd', E, K, out=self.error)
+                self.error *= hd
+                self.evaluations += 6
+
+                np.abs(y, out=self.scale)
+                np.abs(self.y_new, out=work)
+                np.maximum(self.scale, work, out=self.scale)
+                self.scale *= self.rtol
+                self.scale += self.atol
+                _rms(self.error, self.scale, work, norm)
+                np.isfinite(norm, out=mask)
+                np.logical_not(mask, out=mask)
+                np.copyto(norm, np.inf, where=mask)
+                np.less_equal(norm, 1, out=accepted)
+                accepted &= running
+
+            if accepted.any():
+                np.copyto(self.t_old, t)
+                np.add(t, hd[:, 0], out=t, where=accepted)
+                # land on the end exactly, not a rounding error before it
+                np.subtract(t_end, t, out=scratch)
+                scratch *= direction
+                np.less_equal(scratch, 1e-12 * max(1.0, abs(t_end)), out=arrived)
+                arrived &= accepted
+                np.copyto(t, t_end, where=arrived)
+                yield accepted
+                np.copyto(y, self.y_new, where=accepted[:, None])
+                np.copyto(K[0], K[6], where=accepted[:, None])
+                self.steps += accepted
+                np.copyto(status, DONE, where=arrived)
+            np.logical_not(accepted, out=mask)
+            mask &= running
+            self.rejected += mask
+
+            with np.errstate(all='ignore'):
+                # the usual step size controller, with the error of a 5th-order step going like h^5. a
+                # norm of 0 gives an infinite factor, which is clipped to MAX_FACTOR
+                np.power(norm, -0.2, out=factor)
+                factor *= SAFETY
+                np.clip(factor, MIN_FACTOR, MAX_FACTOR, out=factor)
+                np.minimum(factor, 1, out=factor, where=mask)
+                h *= factor
+                np.abs(t, out=scratch)
+                np.maximum(scratch, 1, out=scratch)
+                scratch *= 1e-12
+                np.less_equal(h, scratch, out=mask)
+                np.equal(status, RUNNING, out=running)
+                running &= mask
+                np.copyto(status, FAILED, where=running)
+        status[status == RUNNING] = FAILED
+
+
+# f(t, y) takes the times (batch,) and states (batch, dim) and returns the slopes (batch, dim).
+# integrates every row of y0 from t_span[0] to t_span[1] (which may be smaller), and reports the
+# solutions at t_eval, which have to run from t_span[0] in the same direction
+def solve(f, t_span, y0, t_eval, rtol=1e-6, atol=1e-9, max_steps=100_000):
+    integrator = _Integrator(f, t_span, y0, rtol, atol)
+    t0, direction, y = integrator.t0, integrator.direction, integrator.y
+    t_eval = np.asarray(t_eval, dtype=float)
+    out = np.full((len(t_eval), *y.shape), np.nan)
+    next_out = np.zeros(len(y), dtype=np.int64)
+
+    # output times at the very start
+    while True:
+        start = (next_out < len(t_eval)) & (direction * (t_eval[np.minimum(next_out, len(t_eval) - 1)] - t0) <= 0)
+        if not start.any():
+            break
+        out[next_out[start], start] = y[start]
+        next_out[start] += 1
+
+    for accepted in integrator.run(max_steps):
+        _dense_output(t_eval, direction, integrator.t_old, integrator.t, integrator.h, y, integrator.K, accepted,
+                      next_out, out)
+    return BatchSolution(t_eval, out, integrator.status, integrator.steps, integrator.rejected, integrator.evaluations)
+
+
+class DenseOutput:
+    __slots__ = ('trajectory', 't', 'h', 'y', 'Q', 't_end', 'status')
+
+    # a run of accepted steps, of any of the trajectories: trajectory says which, t where each step
+    # starts, h its (signed) length and y the state there, shape (steps, dim). within a step,
+    #   y(t + theta h) = y + Q[0] theta + Q[1] theta^2 + Q[2] theta^3 + Q[3] theta^4
+    # with Q of shape (steps, 4, dim): the continuous extension with the stages folded in. status is
+    # that of every trajectory of the batch once these steps were taken
+    def __init__(self, trajectory, t, h, y, Q, t_end, status):
+        self.trajectory = trajectory
+        self.t = t
+        self.h = h
+        self.y = y
+        self.Q = Q
+        self.t_end = t_end
+        self.status = status
+
+    def __repr__(self):
+        return f'DenseOutput({len(self.t)} steps of {len(np.unique(self.trajectory))} trajectories)'
+
+    def __len__(self):
+        return len(self.t)
+
+    # the solutions at those of the times (running in the direction of integration) that fall within
+    # the steps: the trajectories, times and states (points, dim). a step covers its start but not its
+    # end, except at the end of the integration, so that consecutive chunks share no points
+    def sample(self, times):
+        times = np.asarray(times, dtype=float)
+        direction = -1.0 if len(self.h) and self.h[0] < 0 else 1.0
+        keys = direction * times
+        end = self.t + self.h
+        first = np.searchsorted(keys, direction * self.t, 'left')
+        last = np.where(end == self.t_end, np.searchsorted(keys, direction * end, 'right'),
+                        np.searchsorted(keys, direction * end, 'left'))
+        counts = np.maximum(last - first, 0)
+        step = np.repeat(np.arange(len(self.t)), counts)
+        index = np.arange(len(step)) - np.repeat(np.cumsum(counts) - counts - first, counts)
+        theta = (times[index] - self.t[step]) / self.h[step]
+        y = self.y[step] + np.einsum('pkd,pk->pd', self.Q[step], theta[:, None] ** np.arange(1, 5))
+        return self.trajectory[step], times[index], y
+
+
+# like solve, but hands out the solutions while integrating: yields every chunk accepted steps (or a
+# few more, up to one per trajectory) as a DenseOutput, and a last one, possibly empty, once every
+# trajectory has arrived or failed. only the current chunk is kept, however long the integration
+def stream(f, t_span, y0, rtol=1e-6, atol=1e-9, chunk=CHUNK, max_steps=100_000):
+    integrator = _Integrator(f, t_span, y0, rtol, atol)
+    parts = []
+    size = 0
+    for accepted in integrator.run(max_steps):
+        rows = np.flatnonzero(accepted)
+        hd = integrator.hd[rows]
+        parts.append((rows, integrator.t_old[rows], hd[:, 0], integrator.y[rows],
+                      hd[:, :, None] * np.einsum('sbd,sk->bkd', integrator.K[:, rows], P)))
+        size += len(rows)
+        if size >= chunk:
+            yield _chunk(parts, integrator)
+            parts = []
+            size = 0
+    yield _chunk(parts, integrator)
+
+
+def _chunk(parts, integrator):
+    if not parts:
+        dim = integrator.y.shape[1]
+        parts = [(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty((0, dim)), np.empty((0, 4, dim)))]
+    return DenseOutput(*map(np.concatenate, zip(*parts)), integrator.t_end, integrator.status.copy())
+
+
+# Hairer, Norsett & Wanner's guess for the first step of every trajectory
+def _initial_step(f, t, y, f0, direction, rtol, atol):
+    scale = atol + rtol * np.abs(y)
+    work, d0, d1 = np.empty_like(y), np.empty(len(y)), np.empty(len(y))
+    _rms(y, scale, work, d0)
+    _rms(f0, scale, work, d1)
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / d1)
+    f1 = f(t + direction * h0, y + direction * h0[:, None] * f0)
+    d2 = np.empty(len(y))
+    _rms(f1 - f0, scale, work, d2)
+    d2 /= h0
+    big = np.maximum(d1, d2)
+    h1 = np.where(big <= 1e-15, np.maximum(1e-6, h0 * 1e-3), (0.01 / big) ** 0.2)
+    h = np.minimum(100 * h0, h1)
+    h[~np.isfinite(h)] = 1e-6
+    return h
+
+
+# write the output times passed by the accepted steps (from t_old to t) into out
+def _dense_output(t_eval, direction, t_old, t, h, y, K, accepted, next_out, out):
+    last = len(t_eval) - 1
+    while True:
+        index = np.minimum(next_out, last)
+        passed = accepted & (next_out <= last) & (direction * (t_eval[index] - t) <= 0)
+        if not passed.any():
+            return
+        rows = next_out[passed]
+        step = direction * h[passed]
+        theta = (t_eval[rows] - t_old[passed]) / step
+        powers = theta[:, None] ** np.arange(1, 5)
+        slope = np.einsum('sbd,sk,bk->bd', K[:, passed], P, powers)
+        out[rows, passed] = y[passed] + step[:, None] * slope
+        next_out[passed] += 1
+
+
+# a right-hand side F(x, y) of a single equation y' = F(x, y), as the batched f(t, y) of solve
+def scalar_system(F):
+    def f(t, y):
+        return F(t, y[:, 0])[:, None]
+    return f
@@ -0,0 +1,412 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from flowchart.classify import EquationError, x, y
+
+# the power series of the solution of y' = F(x, y), y(x0) = y0 around x0, to any order
+#
+# F is compiled into a graph of Taylor arithmetic: one node per subexpression, each with the series of
+# its value along the solution, and a recurrence for its k-th coefficient from lower ones - of its
+# operands, and for y, y_k = F_(k-1) / k, of F. products are Cauchy products, and so are the
+# recurrences of exp, log, sin, cos, ... (f(a) has the coefficients k f_k = sum_j j a_j f'(a)_(k-j)) and
+# of powers. all nodes advance one order at a time, since the next coefficient of y needs the last
+# one of F.
+#
+# the series are memoised, by F, x0 and y0, and extended when more orders are asked for. extension
+# goes in blocks of doubling size: at the start of a block, the part of every Cauchy sum that only
+# needs the coefficients known before the block is taken for all orders of the block from one
+# np.convolve of those, and only the rest is summed order by order, as vectorised dot products.
+# (an FFT convolution would be no faster at the orders that fit into floating point, and its rounding
+# errors swamp the small coefficients of fast-converging series.)
+
+MIN_BLOCK = 16
+MAX_ORDER = 5000
+CACHE_SIZE = 64
+
+
+# the geometric rate at which the coefficients c grow, fitted to their nonzero second half.
+# 1 / rate estimates the radius of convergence
+def _growth(c):
+    k = np.flatnonzero(c[len(c) // 2:]) + len(c) // 2
+    if len(k) < 2:
+        return 1.0
+    with np.errstate(all='ignore'):
+        rate = float(np.exp(np.polyfit(k, np.log(np.abs(c[k])), 1)[0]))
+    return rate if np.isfinite(rate) and rate > 0 else 1.0
+
+
+class _Node:
+    __slots__ = ('c',)
+
+    def __init__(self):
+        self.c = np.zeros(MIN_BLOCK)
+
+    def reserve(self, n):
+        if len(self.c) < n:
+            c = np.zeros(max(n, 2 * len(self.c)))
+            c[:len(self.c)] = self.c
+            self.c = c
+
+    # the Cauchy sums of this node, see _Sum
+    def sums(self):
+        return ()
+
+
+class _Constant(_Node):
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__()
+        self.c[0] = value
+
+    def compute(self, k):
+        pass
+
+
+class _Variable(_Node):
+    __slots__ = ('x0',)
+
+    def __init__(self, x0):
+        super().__init__()
+        self.x0 = x0
+
+    def compute(self, k):
+        self.c[k] = self.x0 if k == 0 else 1.0 if k == 1 else 0.0
+
+
+# y, along the solution
+class _Unknown(_Node):
+    __slots__ = ('y0', 'F')
+
+    def __init__(self, y0):
+        super().__init__()
+        self.y0 = y0
+        self.F = None
+
+    def compute(self, k):
+        self.c[k] = self.y0 if k == 0 else self.F.c[k - 1] / k
+
+
+class _Add(_Node):
+    __slots__ = ('terms',)
+
+    def __init__(self, terms):
+        super().__init__()
+        self.terms = terms
+
+    def compute(self, k):
+        self.c[k] = sum(term.c[k] for term in self.terms)
+
+
+class _Scale(_Node):
+    __slots__ = ('factor', 'a')
+
+    def __init__(self, factor, a):
+        super().__init__()
+        self.factor, self.a = factor, a
+
+    def compute(self, k):
+        self.c[k] = self.factor * self.a.c[k]
+
+
+# sum_(j=0..k) u_j v_(k-j), or with weighted, sum_j j u_j v_(k-j). at order k, v_k may be the coefficient
+# being computed, which is still 0
+class _Sum:
+    __slots__ = ('u', 'v', 'weighted', 'n', 'known')
+
+    def __init__(self, u, v, weighted=False):
+        self.u, self.v, self.weighted = u, v, weighted
+        self.n, self.known = 0, np.zeros(0)
+
+    def _u(self, start, stop):
+        u = self.u.c[start:stop]
+        return u * np.arange(start, stop) if self.weighted else u
+
+    # the first n coefficients are known: convolve them
+    def prepare(self, n):
+        self.n = n
+        self.known = np.convolve(self._u(0, n), self.v.c[:n]) if n else np.zeros(0)
+
+    # sum_(j=start..stop-1) u_j v_(k-j)
+    def _part(self, k, start, stop):
+        if start >= stop:
+            return 0.0
+        return float(np.dot(self._u(start, stop), self.v.c[k - stop + 1:k - start + 1][::-1]))
+
+    def at(self, k):
+        n = self.n
+        # the terms with both j and k - j below n are known
+        start, stop = max(0, k - n + 1), min(k, n - 1) + 1
+        if start >= stop:
+            return self._part(k, 0, k + 1)
+        return self.known[k] + self._part(k, 0, start) + self._part(k, stop, k + 1)
+
+
+class _Product(_Node):
+    __slots__ = ('a', 'b', 'sum')
+
+    def __init__(self, a, b):
+        super().__init__()
+        self.a, self.b = a, b
+        self.sum = _Sum(a, b)
+
+    def sums(self):
+        return (self.sum,)
+
+    def compute(self, k):
+        self.c[k] = self.sum.at(k)
+
+
+# a^r for a real r, with a_0 != 0: k a_0 c_k = sum_(j=1..k) ((r + 1) j - k) a_j c_(k-j)
+class _Power(_Node):
+    __slots__ = ('a', 'r', 'weighted', 'plain')
+
+    def __init__(self, a, r):
+        super().__init__()
+        self.a, self.r = a, r
+        self.weighted, self.plain = _Sum(a, self, weighted=True), _Sum(a, self)
+
+    def sums(self):
+        return self.weighted, self.plain
+
+    def compute(self, k):
+        a0 = self.a.c[0]
+        if k == 0:
+            self.c[0] = a0 ** self.r if a0 else np.nan
+            return
+        # c_k is still 0, so the plain sum leaves out j = 0 by itself
+        self.c[k] = ((self.r + 1) * self.weighted.at(k) - k * self.plain.at(k)) / (k * a0)
+
+
+# f(a), with the node g = f'(a), which may depend on this one: k c_k = sum_(j=1..k) j a_j g_(k-j)
+class _Function(_Node):
+    __slots__ = ('f', 'a', 'g', 'sum')
+
+    def __init__(self, f, a):
+        super().__init__()
+        self.f, self.a, self.g, self.sum = f, a, None, None
+
+    def set_derivative(self, g):
+        self.g, self.sum = g, _Sum(self.a, g, weighted=True)
+
+    def sums(self):
+        return (self.sum,)
+
+    def compute(self, k):
+        self.c[k] = self.f(self.a.c[0]) if k == 0 else self.sum.at(k) / k
+
+
+# the sign of a at the expansion point, as a constant: the derivative of abs
+class _Sign(_Node):
+    __slots__ = ('a',)
+
+    def __init__(self, a):
+        super().__init__()
+        self.a = a
+
+    def compute(self, k):
+        self.c[k] = (np.sign(self.a.c[0]) or np.nan) if k == 0 else 0.0
+
+
+# rewrite what the compiler does not know in terms of what it does
+REWRITES = (
+    (sp.tan, lambda a: sp.sin(a) / sp.cos(a)),
+    (sp.cot, lambda a: sp.cos(a) / sp.sin(a)),
+    (sp.sec, lambda a: 1 / sp.cos(a)),
+    (sp.csc, lambda a: 1 / sp.sin(a)),
+    (sp.sinh, lambda a: (sp.exp(a) - sp.exp(-a)) / 2),
+    (sp.cosh, lambda a: (sp.exp(a) + sp.exp(-a)) / 2),
+    (sp.tanh, lambda a: (sp.exp(a) - sp.exp(-a)) / (sp.exp(a) + sp.exp(-a))),
+)
+
+
+class _Compiler:
+    __slots__ = ('nodes', 'x', 'y')
+
+    def __init__(self, x0, y0):
+        self.x, self.y = _Variable(x0), _Unknown(y0)
+        self.nodes = {x: self.x, y: self.y}
+
+    def __call__(self, expr):
+        if expr not in self.nodes:
+            self.nodes[expr] = self._compile(expr)
+        return self.nodes[expr]
+
+    def _compile(self, expr):
+        if expr.is_number:
+            value = complex(expr)
+            if value.imag:
+                raise EquationError('F has complex values')
+            return _Constant(value.real)
+        if expr.is_Add:
+            return _Add([self(term) for term in expr.args])
+        if expr.is_Mul:
+            factor, rest = expr.as_coeff_Mul()
+            if factor != 1:
+                return _Scale(float(factor), self(rest))
+            *others, last = expr.args
+            return _Product(self(sp.Mul(*others)), self(last))
+        if expr.is_Pow:
+            base, exponent = expr.args
+            if not exponent.is_number:
+                return self(sp.exp(exponent * sp.log(base)))
+            if exponent.is_Integer and exponent > 1:
+                half = self(base ** (exponent // 2))
+                square = _Product(half, half)
+                return square if exponent % 2 == 0 else _Product(square, self(base))
+            if exponent.is_Integer and exponent < -1:
+                return _Power(self(base ** -exponent), -1.0)
+            return _Power(self(base), float(exponent))
+        if isinstance(expr, (sp.exp, sp.sin, sp.cos, sp.log, sp.atan, sp.asin, sp.acos, sp.Abs)):
+            return self._function(expr)
+        raise EquationError(f'there is no power series for {expr.func} yet')
+
+    def _function(self, expr):
+        a = expr.args[0]
+        node = self(a)
+        if isinstance(expr, sp.exp):
+            result = _Function(np.exp, node)
+            result.set_derivative(result)
+        elif isinstance(expr, (sp.sin, sp.cos)):
+            sin, cos = _Function(np.sin, node), _Function(np.cos, node)
+            sin.set_derivative(cos)
+            cos.set_derivative(_Scale(-1.0, sin))
+            self.nodes[sp.sin(a)], self.nodes[sp.cos(a)] = sin, cos
+            result = sin if isinstance(expr, sp.sin) else cos
+        elif isinstance(expr, sp.log):
+            result = _Function(np.log, node)
+            result.set_derivative(self(1 / a))
+        elif isinstance(expr, sp.atan):
+            result = _Function(np.arctan, node)
+            result.set_derivative(self(1 / (1 + a ** 2)))
+        elif isinstance(expr, sp.asin):
+            result = _Function(np.arcsin, node)
+            result.set_derivative(self(1 / sp.sqrt(1 - a ** 2)))
+        elif isinstance(expr, sp.acos):
+            result = _Function(np.arccos, node)
+            result.set_derivative(self(-1 / sp.sqrt(1 - a ** 2)))
+        else:
+            result = _Function(np.abs, node)
+            result.set_derivative(_Sign(node))
+        return result
+
+
+# every node reachable from root, each after the nodes its coefficient of the same order depends on
+def _order(root):
+    order, seen = [], set()
+
+    def visit(node):
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        # the unknown y and the derivative g of a function only need lower orders
+        later = []
+        if isinstance(node, _Unknown):
+            later.append(node.F)
+        elif isinstance(node, _Function):
+            visit(node.a)
+            later.append(node.g)
+        else:
+            for name in ('a', 'b'):
+                if hasattr(node, name):
+                    visit(getattr(node, name))
+            for term in getattr(node, 'terms', ()):
+                visit(term)
+        order.append(node)
+        for node in later:
+            visit(node)
+
+    visit(root)
+    return order
+
+
+class Series:
+    __slots__ = ('F', 'x0', 'y0', 'nodes', 'n', 'limit', 'lock', '_y')
+
+    # F is the SymPy expression of the right-hand side. raises EquationError if there is no power
+    # series of F or of the solution at (x0, y0)
+    def __init__(self, F, x0, y0):
+        self.F, self.x0, self.y0 = F, float(x0), float(y0)
+        for function, rewrite in REWRITES:
+            F = F.replace(function, rewrite)
+        compiler = _Compiler(self.x0, self.y0)
+        root = compiler(F)
+        self._y = compiler.y
+        self._y.F = root
+        self.nodes = _order(self._y)
+        self.n, self.limit = 0, MAX_ORDER
+        self.lock = threading.Lock()
+        self.coefficients(MIN_BLOCK)
+
+    def __repr__(self):
+        return f'Series({self.F}, x0={self.x0}, y0={self.y0}, {self.n} coefficients)'
+
+    # the first n coefficients of the solution (a read-only view), computing those not known yet.
+    # fewer if the series ends at limit
+    def coefficients(self, n):
+        with self.lock:
+            while self.n < min(n, self.limit):
+                self._extend(min(self.limit, max(2 * self.n, MIN_BLOCK)))
+            n = min(n, self.n)
+        c = self._y.c[:n]
+        c.flags.writeable = False
+        return c
+
+    def _extend(self, n):
+        for node in self.nodes:
+            node.reserve(n + 1)
+            for s in node.sums():
+                s.prepare(self.n)
+        with np.errstate(all='ignore'):
+            for k in range(self.n, n):
+                for node in self.nodes:
+                    node.compute(k)
+        finite = np.isfinite(self._y.c[:n])
+        if not finite[:2].all():
+            raise EquationError('the solution has no power series there, F is not smooth at the starting point')
+        if not finite.all():
+            # the coefficients outgrow floating point, which happens far beyond any use for a small radius
+            # of convergence: this is as far as the series goes
+            self.limit = self.n = int(np.argmin(finite))
+            return
+        self.n = n
+
+    # the partial sums of order n - the first n terms - at the points xs
+    def partial_sum(self, xs, n):
+        with np.errstate(all='ignore'):
+            return np.polynomial.polynomial.polyval(np.asarray(xs, dtype=float) - self.x0, self.coefficients(n))
+
+    # the partial sums at xs for every order in orders, computing the coefficients as they are needed.
+    # yields (order, partial sum)
+    def partial_sums(self, xs, orders):
+        for n in orders:
+            yield n, self.partial_sum(xs, n)
+
+    # an estimate of the radius of convergence from the first n coefficients
+    def radius(self, n):
+        c = self.coefficients(n)
+        rate = _growth(c)
+        return 1 / rate if len(np.flatnonzero(c[len(c) // 2:])) >= 2 else np.inf
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# the memoised series of the solution of y' = F(x, y), y(x0) = y0
+def series(F, x0, y0):
+    key = (sp.srepr(F), float(x0), float(y0))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = Series(F, x0, y0)
+    with _cache_lock:
+        result = _cache.setdefault(key, result)
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
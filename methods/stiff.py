@@ -0,0 +1,335 @@
+import numpy as np
+
+from .numerical import DONE, FAILED, RUNNING, BatchSolution, _initial_step
+
+# implicit integration of stiff ODEs, for a batch of initial value problems at once
+#
+# explicit methods need steps of the size of the fastest time scale in the problem, even once
+# nothing happens on it any more. this is the variable-order (1 to 5), quasi-constant step size
+# backward differentiation formula method of Shampine & Reichelt (NDF, as in MATLAB's ode15s), which
+# is stable with steps of the size of the slow time scales.
+#
+# every step solves its implicit equation by a simplified Newton iteration with the matrix I - c J,
+# and neither the Jacobian J nor the LU factors of that matrix are recomputed every step: the LU
+# factors are kept until the step size or order changes, and the Jacobian until the Newton iteration
+# stops converging with it - only then is it evaluated again.
+#
+# the trajectories of the batch are independent, so the Jacobian is block-diagonal: one (dim, dim)
+# block per trajectory, and the LU factorisation runs over all blocks at once. the whole batch shares
+# one step size and order, so it moves at the pace of its most demanding trajectory. when the step
+# size falls below what the floating point numbers can resolve, the trajectories that kept the step
+# from being taken (whose Newton iteration did not converge, or whose error was too large - e.g.
+# because they blow up) are dropped from the batch: they are frozen, like the failed trajectories of
+# the explicit engine, and the method starts over at order 1 from there with the rest.
+#
+# the Jacobian is either given (e.g. derived symbolically from the right-hand side), or computed by
+# finite differences. these perturb one column of every block at once - since the blocks do not
+# share rows, the whole batch costs no more evaluations than a single trajectory. given the sparsity
+# pattern of a block, columns that do not share rows either are grouped (coloured) and perturbed
+# together as well.
+
+MAX_ORDER = 5
+NEWTON_MAXITER = 4
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+EPS = np.finfo(float).eps
+
+# the NDF coefficients
+KAPPA = np.array([0, -0.1850, -1 / 9, -0.0823, -0.0415, 0])
+GAMMA = np.hstack((0, np.cumsum(1 / np.arange(1, MAX_ORDER + 1))))
+ALPHA = (1 - KAPPA) * GAMMA
+ERROR_CONST = KAPPA * GAMMA + 1 / np.arange(1, MAX_ORDER + 2)
+
+
+# LU factorisation with partial pivoting of a stack of matrices (batch, n, n), all at once.
+# returns (LU, pivots) for lu_solve
+def lu_factor(M):
+    LU = np.array(M, dtype=float)
+    batch, n, _ = LU.shape
+    rows = np.arange(batch)
+    pivots = np.empty((batch, n), dtype=np.intp)
+    for k in range(n):
+        p = k + np.argmax(np.abs(LU[:, k:, k]), axis=1)
+        pivots[:, k] = p
+        LU[rows, k], LU[rows, p] = LU[rows, p], LU[rows, k].copy()
+        LU[:, k + 1:, k] /= LU[:, k, k, None]
+        LU[:, k + 1:, k + 1:] -= LU[:, k + 1:, k, None] * LU[:, k, None, k + 1:]
+    return LU, pivots
+
+
+# solve M x = b for every matrix of the stack and right-hand side b (batch, n)
+def lu_solve(factors, b):
+    LU, pivots = factors
+    x = np.array(b, dtype=float)
+    rows = np.arange(len(x))
+    n = x.shape[1]
+    for k in range(n):
+        p = pivots[:, k]
+        x[rows, k], x[rows, p] = x[rows, p], x[rows, k].copy()
+    for k in range(n - 1):
+        x[:, k + 1:] -= LU[:, k + 1:, k] * x[:, k, None]
+    for k in range(n - 1, -1, -1):
+        x[:, k] /= LU[:, k, k]
+        x[:, :k] -= LU[:, :k, k] * x[:, k, None]
+    return x
+
+
+# group the columns of a sparsity pattern (n, n) such that no two columns of a group have a nonzero
+# in the same row. greedy, in column order. returns a list of arrays of column indices
+def colour_columns(sparsity):
+    sparsity = np.asarray(sparsity, dtype=bool)
+    groups, covered = [], []
+    for column in range(sparsity.shape[1]):
+        for group, rows in zip(groups, covered):
+            if not (rows & sparsity[:, column]).any():
+                group.append(column)
+                rows |= sparsity[:, column]
+                break
+        else:
+            groups.append([column])
+            covered.append(sparsity[:, column].copy())
+    return [np.array(group) for group in groups]
+
+
+# finite-difference Jacobian blocks (batch, dim, dim) of f at (t, y), where f0 = f(t, y).
+# one evaluation of f per group of columns
+def fd_jacobian(f, t, y, f0, groups, sparsity):
+    batch, dim = y.shape
+    J = np.zeros((batch, dim, dim))
+    delta = np.sqrt(EPS) * np.maximum(np.abs(y), 1e-8 + np.sqrt(EPS))
+    delta = (y + delta) - y
+    for group in groups:
+        perturbed = y.copy()
+        perturbed[:, group] += delta[:, group]
+        difference = f(t, perturbed) - f0
+        for column in group:
+            rows = sparsity[:, column]
+            J[:, rows, column] = difference[:, rows] / delta[:, column, None]
+    return J
+
+
+def _change_differences(D, order, factor):
+    def R(factor):
+        i = np.arange(1, order + 1)[:, None]
+        M = np.zeros((order + 1, order + 1))
+        M[1:, 1:] = (i - 1 - factor * np.arange(1, order + 1)) / i
+        M[0] = 1
+        return np.cumprod(M, axis=0)
+    RU = R(factor).dot(R(1))
+    D[:order + 1] = np.einsum('ji,jbd->ibd', RU, D[:order + 1])
+
+
+# RMS norm of x / scale per trajectory, infinite where it is not finite
+def _row_norms(x, scale):
+    norms = np.sqrt(np.mean((x / scale) ** 2, axis=1))
+    norms[~np.isfinite(norms)] = np.inf
+    return norms
+
+
+# largest RMS norm of x / scale over the trajectories that are still running
+def _norm(x, scale, running):
+    return _row_norms(x[running], scale[running]).max(initial=0.0)
+
+
+# f(t, y) as in numerical.solve. jac(t, y), if given, returns the Jacobian blocks (batch, dim, dim) of
+# f; otherwise they are computed by finite differences, using the sparsity pattern (dim, dim) of a
+# block if there is one. otherwise like numerical.solve
+def solve(f, t_span, y0, t_eval, rtol=1e-6, atol=1e-9, jac=None, sparsity=None, max_steps=100_000):
+    t0, t_end = map(float, t_span)
+    direction = 1.0 if t_end >= t0 else -1.0
+    y = np.array(y0, dtype=float, ndmin=2)
+    batch, dim = y.shape
+    t_eval = np.asarray(t_eval, dtype=float)
+    rtol = max(rtol, 100 * EPS)
+    newton_tol = max(10 * EPS / rtol, min(0.03, rtol ** 0.5))
+
+    sparsity = np.ones((dim, dim), dtype=bool) if sparsity is None else np.asarray(sparsity, dtype=bool)
+    groups = colour_columns(sparsity)
+    evaluations = 0
+    jacobians = factorisations = 0
+
+    def jacobian(t, y, fy):
+        nonlocal evaluations, jacobians
+        jacobians += 1
+        if jac is not None:
+            return np.asarray(jac(np.full(batch, t), y), dtype=float).reshape(batch, dim, dim)
+        evaluations += len(groups)
+        return fd_jacobian(f, np.full(batch, t), y, fy, groups, sparsity)
+
+    out = np.full((len(t_eval), batch, dim), np.nan)
+    next_out = 0
+    while next_out < len(t_eval) and direction * (t_eval[next_out] - t0) <= 0:
+        out[next_out] = y
+        next_out += 1
+
+    with np.errstate(all='ignore'):
+        t = t0
+        fy = f(np.full(batch, t), y)
+        h = float(_initial_step(f, np.full(batch, t), y, fy, direction, rtol, atol).min())
+        evaluations += 2
+        J = jacobian(t, y, fy)
+        current_jacobian = True
+        factors = None
+
+        D = np.zeros((MAX_ORDER + 3, batch, dim))
+        D[0] = y
+        D[1] = fy * h * direction
+        order, equal_steps = 1, 0
+        status = np.full(batch, RUNNING, dtype=np.int8)
+        running = np.ones(batch, dtype=bool)
+        steps, rejected = np.zeros(batch, dtype=np.int64), np.zeros(batch, dtype=np.int64)
+        identity = np.eye(dim)
+        # the error of the last step tried, per trajectory
+        errors = np.zeros(batch)
+
+        while steps.max(initial=0) < max_steps and running.any():
+            if direction * (t_end - t) <= 0:
+                status[running] = DONE
+                break
+            # the step, with its Newton iteration. stuck are the trajectories that kept the last
+            # attempt from being accepted
+            accepted = False
+            stuck = np.zeros(batch, dtype=bool)
+            while not accepted:
+                if h < 10 * EPS * max(1.0, abs(t)):
+                    # drop the trajectories that cannot be followed - those that kept the last attempt
+                    # from being accepted, or else the most demanding ones - and start over from here,
+                    # at order 1, with the others
+                    stuck &= running
+                    if not stuck.any():
+                        stuck = running & (errors >= errors[running].max())
+                    if stuck.sum() == running.sum():
+                        break
+                    _freeze(stuck, status, running)
+                    fy = f(np.full(batch, t), y)
+                    h = float(_initial_step(f, np.full(batch, t), y, fy, direction, rtol, atol)[running].min())
+                    evaluations += 2
+                    J = jacobian(t, y, fy)
+                    current_jacobian, factors = True, None
+                    D[:] = 0
+                    D[0] = y
+                    D[1, running] = fy[running] * h * direction
+                    order, equal_steps = 1, 0
+                    errors[:] = 0
+                    continue
+                t_new = t + direction * h
+                if direction * (t_new - t_end) > 0:
+                    factor = abs(t_end - t) / h
+                    _change_differences(D, order, factor)
+                    h, t_new, factors = h * factor, t_end, None
+                c = direction * h / ALPHA[order]
+                y_predict = D[:order + 1].sum(axis=0)
+                scale = atol + rtol * np.abs(y_predict)
+                psi = np.einsum('k,kbd->bd', GAMMA[1:order + 1], D[1:order + 1]) / ALPHA[order]
+
+                while True:
+                    if factors is None:
+                        factors = lu_factor(identity - c * J)
+                        factorisations += 1
+                    converged, iterations, y_new, d, stuck = _newton(f, t_new, y_predict, c, psi, factors, scale,
+                                                                    newton_tol, batch, running)
+                    evaluations += iterations
+                    if converged or current_jacobian:
+                        break
+                    # the Newton iteration stopped converging with the old Jacobian: update it
+                    J = jacobian(t_new, y_predict, f(np.full(batch, t_new), y_predict))
+                    evaluations += 1
+                    current_jacobian, factors = True, None
+
+                if not converged:
+                    _change_differences(D, order, 0.5)
+                    h, factors = h * 0.5, None
+                    rejected += running
+                    continue
+
+                safety = 0.9 * (2 * NEWTON_MAXITER + 1) / (2 * NEWTON_MAXITER + iterations)
+                scale = atol + rtol * np.abs(y_new)
+                errors = _row_norms(ERROR_CONST[order] * d, scale)
+                errors[~running] = 0
+                error_norm = errors[running].max()
+                if error_norm > 1:
+                    stuck = running & (errors > 1)
+                    factor = max(MIN_FACTOR, safety * error_norm ** (-1 / (order + 1)))
+                    _change_differences(D, order, factor)
+                    h, factors = h * factor, None
+                    rejected += running
+                else:
+                    accepted = True
+            if not accepted:
+                break
+
+            steps += running
+            equal_steps += 1
+            t_old, t, y = t, t_new, y_new
+            current_jacobian = False
+            D[order + 2] = d - D[order + 1]
+            D[order + 1] = d
+            for i in range(order, -1, -1):
+                D[i] += D[i + 1]
+
+            # output times passed by this step, from the interpolating polynomial of the last order + 1 points
+            passed = next_out
+            while passed < len(t_eval) and direction * (t_eval[passed] - t) <= 0:
+                passed += 1
+            if passed > next_out:
+                shift = t - direction * h * np.arange(order)
+                x = (t_eval[next_out:passed, None] - shift) / (direction * h * (1 + np.arange(order)))
+                values = D[0] + np.einsum('kbd,mk->mbd', D[1:order + 1], np.cumprod(x, axis=1))
+                out[next_out:passed, running] = values[:, running]
+                next_out = passed
+
+            if equal_steps < order + 1:
+                continue
+            # try the neighbouring orders, and go with the one that allows the largest next step
+            error_m = _norm(ERROR_CONST[order - 1] * D[order], scale, running) if order > 1 else np.inf
+            error_p = _norm(ERROR_CONST[order + 1] * D[order + 2], scale, running) if order < MAX_ORDER else np.inf
+            norms = np.array([error_m, error_norm, error_p])
+            factors_by_order = norms ** (-1 / np.arange(order, order + 3))
+            order += int(np.argmax(factors_by_order)) - 1
+            factor = min(MAX_FACTOR, safety * np.max(factors_by_order))
+            _change_differences(D, order, factor)
+            h, factors, equal_steps = h * factor, None, 0
+
+    status[status == RUNNING] = FAILED
+    return BatchSolution(t_eval, out, status, steps, rejected, evaluations, jacobians, factorisations)
+
+
+# take the trajectories of the mask frozen out of the batch: they fail, and stay where their last
+# accepted step left them
+def _freeze(frozen, status, running):
+    status[frozen] = FAILED
+    running &= ~frozen
+
+
+# the simplified Newton iteration for the implicit equation of one step, for the running trajectories
+# (the others are left at the prediction). returns (converged, iterations, solution, its difference to
+# the prediction, the trajectories that kept it from converging)
+def _newton(f, t, y_predict, c, psi, factors, scale, tol, batch, running):
+    d = np.zeros_like(y_predict)
+    y = y_predict.copy()
+    previous = None
+    converged = False
+    stuck = np.zeros(batch, dtype=bool)
+    for k in range(NEWTON_MAXITER):
+        fy = f(np.full(batch, t), y)
+        finite = np.isfinite(fy).all(axis=1)
+        if not finite[running].all():
+            stuck = running & ~finite
+            break
+        dy = lu_solve(factors, c * fy - psi - d)
+        dy[~running] = 0
+        norms = _row_norms(dy, scale)
+        dy_norm = norms[running].max()
+        rate = None if previous is None else dy_norm / previous
+        if rate is not None and (rate >= 1 or rate ** (NEWTON_MAXITER - k) / (1 - rate) * dy_norm > tol):
+            stuck = running & (norms > tol)
+            break
+        y += dy
+        d += dy
+        if dy_norm == 0 or rate is not None and rate / (1 - rate) * dy_norm < tol:
+            converged = True
+            break
+        previous = dy_norm
+    else:
+        stuck = running & (norms > tol)
+    return converged, k + 1, y, d, stuck
@@ -0,0 +1,142 @@
+import math
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import sympy as sp
+
+from flowchart.classify import x, y
+from flowchart.workers import hidden_main
+
+from .numerical import DONE, solve
+
+# solve a whole family of ODEs y' = F(x, y; a, b, ...), for every point of a grid of parameter values
+#
+# the grid is cut into chunks of rows, which are solved on a pool of worker processes, every chunk as
+# one batch of the Runge-Kutta engine with the parameters of its trajectories as arrays. the workers
+# write the solutions straight into an array in shared memory, and only send back how many of their
+# trajectories failed. submitting returns at once: the caller collects the chunks as they finish, by
+# waiting for them or by polling, and can show results while the rest of the grid is still being
+# solved. collecting a chunk copies it out of the shared memory, which is never seen outside this
+# module - SharedMemory.close unmaps it under the feet of any NumPy array still using it.
+#
+# the pool is started on first use and shared by all sweeps of the process. it starts workers as it
+# needs them, on submit, so submitting hides the app script from them (see flowchart/workers.py).
+
+CHUNK = 256
+MAX_POINTS = 100_000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+@lru_cache(maxsize=64)
+def _compile(F, names):
+    return sp.lambdify((x, y, *map(sp.Symbol, names)), F, 'numpy')
+
+
+# in a worker: solve rows start:stop of the grid and write them into the results in shared memory.
+# returns the number of trajectories that failed
+def _solve_chunk(memory, shape, F, names, axes, y0, t_span, t_eval, start, stop, rtol, atol):
+    G = _compile(F, names)
+    index = np.unravel_index(np.arange(start, stop), [len(axis) for axis in axes])
+    values = [np.asarray(axis, dtype=float)[i] for axis, i in zip(axes, index)]
+
+    def f(t, y):
+        return np.broadcast_to(G(t, y[:, 0], *values), (len(y),))[:, None]
+
+    solution = solve(f, t_span, np.full((stop - start, 1), float(y0)), t_eval, rtol, atol)
+    shared = SharedMemory(memory)
+    try:
+        np.ndarray(shape, buffer=shared.buf)[start:stop] = solution.y[:, :, 0].T
+    finally:
+        shared.close()
+    return int((solution.status != DONE).sum())
+
+
+def _release(memory):
+    memory.close()
+    memory.unlink()
+
+
+class Sweep:
+    __slots__ = ('names', 'axes', 't', 'y', 'size', 'done', 'failed', 'pending', '_shared', '_release',
+                 '__weakref__')
+
+    # F is the SymPy expression of the right-hand side, names those of its parameters, and axes their
+    # values: the grid is every combination of them. every point is solved with y(t_span[0]) = y0, and
+    # reported at the times t_eval. y holds the solutions, shape (grid points, len(t_eval)), NaN until
+    # its chunk has come in or where the solve failed
+    def __init__(self, F, names, axes, y0, t_span, t_eval, rtol=1e-6, atol=1e-9, chunk=CHUNK):
+        if len(names) != len(axes):
+            raise ValueError('one axis per parameter')
+        self.names = tuple(names)
+        self.axes = tuple(np.asarray(axis, dtype=float) for axis in axes)
+        self.t = np.asarray(t_eval, dtype=float)
+        self.size = math.prod(len(axis) for axis in self.axes)
+        if not 0 < self.size <= MAX_POINTS:
+            raise ValueError(f'a sweep has 1 to {MAX_POINTS} points')
+        shape = (self.size, len(self.t))
+        memory = SharedMemory(create=True, size=max(1, self.size * len(self.t) * 8))
+        self._release = weakref.finalize(self, _release, memory)
+        self._shared = np.ndarray(shape, buffer=memory.buf)
+        self.y = np.full(shape, np.nan)
+        self.done = self.failed = 0
+
+        executor = _get_executor()
+        axes = tuple(axis.tolist() for axis in self.axes)
+        with hidden_main():
+            self.pending = {executor.submit(_solve_chunk, memory.name, shape, F, self.names, axes, y0, t_span,
+                                            self.t, start, min(start + chunk, self.size), rtol, atol):
+                            (start, min(start + chunk, self.size))
+                            for start in range(0, self.size, chunk)}
+
+    def __repr__(self):
+        return f'Sweep({", ".join(self.names)}: {self.done} of {self.size} points done, {self.failed} failed)'
+
+    @property
+    def finished(self):
+        return not self.pending
+
+    # the parameter values of grid points (flat indices), one array per parameter
+    def parameters(self, points):
+        index = np.unravel_index(points, [len(axis) for axis in self.axes])
+        return [axis[i] for axis, i in zip(self.axes, index)]
+
+    def _collect(self, future):
+        start, stop = self.pending.pop(future)
+        self.failed += future.result()
+        self.done += stop - start
+        self.y[start:stop] = self._shared[start:stop]
+        return start, stop
+
+    # the chunks finished since the last call, as (start, stop) ranges of grid points. does not wait
+    def poll(self):
+        return [self._collect(future) for future in [future for future in self.pending if future.done()]]
+
+    # the chunks, as they finish. waits for them
+    def results(self, timeout=None):
+        for future in as_completed(list(self.pending), timeout):
+            yield self._collect(future)
+
+    # stop solving the chunks that have not started yet, and free the shared memory. chunks that have
+    # not come in yet are lost
+    def close(self):
+        for future in self.pending:
+            future.cancel()
+        self.pending = {}
+        self._shared = None
+        self._release()
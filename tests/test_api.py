@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from flowchart import api, load_flowchart
+
+
+# send parts with pauses of pause seconds in between, and return what the server answers before it
+# closes the connection
+def exchange(monkeypatch, parts, pause=0.0):
+    monkeypatch.setattr(api, 'IDLE_TIMEOUT', 0.5)
+    monkeypatch.setattr(api, 'REQUEST_TIMEOUT', 0.2)
+
+    async def run():
+        server = await asyncio.start_server(api.FlowchartAPI(load_flowchart()).handle, '127.0.0.1', 0,
+                                            limit=api.MAX_HEAD)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            for part in parts:
+                writer.write(part)
+                await writer.drain()
+                await asyncio.sleep(pause)
+            answer = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return answer
+
+    return asyncio.run(run())
+
+
+def status(answer):
+    return int(answer.split(b' ', 2)[1])
+
+
+def test_walk(monkeypatch):
+    body = json.dumps([]).encode()
+    answer = exchange(monkeypatch, [b'POST /walk HTTP/1.1\r\nConnection: close\r\n'
+                                    + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body])
+    assert status(answer) == 200
+    assert json.loads(answer.split(b'\r\n\r\n', 1)[1])['path'] == [0]
+
+
+def test_idle_connection_is_closed(monkeypatch):
+    assert exchange(monkeypatch, []) == b''
+
+
+def test_slow_head(monkeypatch):
+    answer = exchange(monkeypatch, [b'GET /node/0 HTTP/1.1\r\n', b'Host: x\r\n'], pause=0.3)
+    assert status(answer) == 408
+
+
+def test_slow_body(monkeypatch):
+    answer = exchange(monkeypatch, [b'POST /walk HTTP/1.1\r\nContent-Length: 10\r\n\r\n[]'], pause=0.3)
+    assert status(answer) == 408
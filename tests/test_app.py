@@ -0,0 +1,31 @@
+import os
+import random
+from unittest import mock
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import flowchart
+from flowchart import prefetch
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit_ode.py')
+
+
+# the answer and "go back" buttons, not the tools' own
+def navigation(session):
+    return [button for button in session.button
+            if button.key and (button.key.startswith('ode_edge_') or button.key == prefetch.BACK_KEY)]
+
+
+# the flowchart is built once per process: no rerun, and no other session, builds it again
+def test_reruns_do_not_load_the_flowchart():
+    st.cache_resource.clear()
+    with mock.patch.object(flowchart, 'load_flowchart', wraps=flowchart.load_flowchart) as load:
+        rng = random.Random(0)
+        for _ in range(3):
+            session = AppTest.from_file(APP, default_timeout=30).run()
+            assert not session.exception
+            for _ in range(5):
+                rng.choice(navigation(session)).click().run()
+                assert not session.exception
+        assert load.call_count == 1
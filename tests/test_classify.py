@@ -0,0 +1,35 @@
+import pytest
+
+from flowchart import classify, load_flowchart
+from flowchart.classify import EquationError
+
+
+@pytest.mark.parametrize('text, order, F', [
+    ("y' = x y", 1, 'x*y'),
+    ("dy/dx = a x + b", 1, 'a*x + b'),
+    ("x y = y'", 1, 'x*y'),
+    ("y(x)' y = x", 1, 'x/y'),
+    ("y'' + y = 0", 2, None),
+])
+def test_parse(text, order, F):
+    assert classify.parse_safely(text)[0] == order
+    assert str(classify.parse_safely(text)[1]) == str(F)
+
+
+@pytest.mark.parametrize('text', [
+    '', 'hello', 'import os', 'x y', "y'", 'y = x', "y' = 1/0", "y' = 0/0", "y' = ln(0)", "y' = 1/(x - x)",
+    "y' = x = y", "x' = y", 'os.system()', '__import__', "y' = 2^9^9^9",
+])
+def test_not_an_equation(text):
+    with pytest.raises(EquationError):
+        classify.parse_safely(text)
+
+
+def test_classify():
+    chart = load_flowchart()
+    nodes, inconclusive = classify.classify(chart, "y' = x y")
+    assert chart.names[nodes[0]] == 'start'
+    assert chart.names[nodes[-1]] == 'is_separable'
+    assert not inconclusive
+    with pytest.raises(EquationError):
+        classify.classify(chart, 'x y')
@@ -0,0 +1,77 @@
+import os
+import threading
+
+from flowchart import eventlog
+
+
+def records(count, start=0):
+    return [(bytes([i % 256]) * 8, eventlog.ANSWER, i % 45, (i + 1) % 45, float(i))
+            for i in range(start, start + count)]
+
+
+def append(path, batch):
+    fd = eventlog.open_log(path)
+    try:
+        os.write(fd, bytes(eventlog.frame(b''.join(eventlog.RECORD.pack(*record) for record in batch))))
+    finally:
+        os.close(fd)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'events.log'
+    append(path, records(10))
+    append(path, records(5, 10))
+    assert list(eventlog.read_records(path, chunk=3)) == records(15)
+
+
+# a write cut short by a crash, followed by batches of other processes
+def test_partial_record_is_skipped(tmp_path):
+    path = tmp_path / 'events.log'
+    append(path, records(10))
+    for cut in range(1, eventlog.FRAME.size):
+        fd = eventlog.open_log(path)
+        os.write(fd, bytes(eventlog.frame(eventlog.RECORD.pack(*records(1, 99)[0])))[:cut])
+        os.close(fd)
+        append(path, records(3, 10 + 3 * (cut - 1)))
+    expected = records(10 + 3 * (eventlog.FRAME.size - 1))
+    for chunk in (1, 2, 7, 65536):
+        assert list(eventlog.read_records(path, chunk)) == expected
+
+
+def test_partial_record_at_the_end(tmp_path):
+    path = tmp_path / 'events.log'
+    append(path, records(4))
+    fd = eventlog.open_log(path)
+    os.write(fd, bytes(eventlog.frame(eventlog.RECORD.pack(*records(1, 4)[0])))[:-1])
+    os.close(fd)
+    assert list(eventlog.read_records(path)) == records(4)
+
+
+# processes starting to log at once: one of them creates the file, and it has one header
+def test_concurrent_open(tmp_path):
+    path = tmp_path / 'events.log'
+    barrier = threading.Barrier(16)
+
+    def log(i):
+        barrier.wait()
+        append(path, records(2, 2 * i))
+
+    threads = [threading.Thread(target=log, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(eventlog.read_records(path), key=lambda record: record[4]) == records(32)
+    assert os.path.getsize(path) == eventlog.HEADER.size + 32 * eventlog.FRAME.size
+    assert os.listdir(tmp_path) == ['events.log']
+
+
+def test_not_an_event_log(tmp_path):
+    path = tmp_path / 'other.log'
+    path.write_bytes(b'not an event log')
+    try:
+        eventlog.open_log(path)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('appended to a file that is not an event log')
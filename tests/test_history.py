@@ -0,0 +1,130 @@
+import base64
+import random
+
+import pytest
+
+from flowchart import load_flowchart
+from flowchart.history import MAX_HISTORY, MAX_TOKEN_LENGTH, NodeHistory, decode_history, encode_history
+
+
+@pytest.fixture(scope='module')
+def chart():
+    return load_flowchart()
+
+
+# a flowchart of size nodes, with an edge between any two
+class Complete:
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def successors(self, node):
+        return range(self.size)
+
+
+def token(data):
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b'=').decode('ascii')
+
+
+# thousands of random clicks, answers (including "return to start") and "go back", as the app makes them
+def random_clicks(chart, history, clicks, seed):
+    rng = random.Random(seed)
+    for _ in range(clicks):
+        edges = chart.out_edges(history.current)
+        if not edges or (len(history) > 1 and rng.random() < 0.2):
+            history.pop()
+        else:
+            history.push(rng.choice(edges)[1])
+        yield history
+
+
+# also with a capacity below the depth of the flowchart, so that the oldest nodes are dropped
+@pytest.mark.parametrize('capacity', [MAX_HISTORY, 4])
+def test_length_stays_bounded(chart, capacity):
+    returns = 0
+    for history in random_clicks(chart, NodeHistory(capacity=capacity), 10_000, seed=0):
+        assert 1 <= len(history) <= capacity
+        returns += history.current == 0
+    # the walks went round through "return to start" many times
+    assert returns > 100
+
+
+def test_long_walks_keep_the_latest_nodes():
+    history = NodeHistory(capacity=8)
+    for node in range(1, 1000):
+        history.push(node)
+    assert list(history) == list(range(992, 1000))
+    assert history.pop() == 998
+
+
+# the history is always a walk without repeated nodes, so it can be restored from the URL
+def test_history_stays_a_walk(chart):
+    for history in random_clicks(chart, NodeHistory(), 5_000, seed=1):
+        nodes = list(history)
+        assert len(set(nodes)) == len(nodes)
+        assert decode_history(encode_history(nodes), chart) == nodes
+
+
+def test_revisit_collapses_history():
+    history = NodeHistory([0, 1, 17, 3])
+    history.push(0)
+    assert list(history) == [0]
+    history = NodeHistory([0, 1, 17, 3, 5])
+    history.push(17)
+    assert list(history) == [0, 1, 17]
+    assert history.pop() == 1
+
+
+def test_pop_at_start():
+    history = NodeHistory()
+    assert history.pop() == 0
+    assert history.pop() == 0
+    assert list(history) == [0]
+    assert history.previous is None
+
+
+def test_empty_history():
+    with pytest.raises(ValueError):
+        NodeHistory([])
+
+
+# ids of one, two and three bytes, and histories longer than MAX_HISTORY, of which the end is kept
+@pytest.mark.parametrize('nodes', [[0], [0, 1], [0, 1, 17, 3, 5, 9], [0, 127, 128, 16383, 16384, 65535],
+                                   list(range(200, 300)), [65535] * MAX_HISTORY])
+def test_encode_decode_roundtrip(nodes):
+    encoded = encode_history(nodes)
+    assert len(encoded) <= MAX_TOKEN_LENGTH
+    assert decode_history(encoded, Complete(65536)) == nodes[-MAX_HISTORY:]
+
+
+def test_roundtrip_through_chart(chart):
+    for node in range(len(chart)):
+        nodes = chart.path_to(node)
+        if nodes:
+            assert decode_history(encode_history(nodes), chart) == list(nodes)
+
+
+@pytest.mark.parametrize('token', [
+    None, '', '!!!!', 'AAA*', '_w',
+    # too long, even if it decoded
+    'A' * (MAX_TOKEN_LENGTH + 1),
+    # a varint that never ends, or is longer than three bytes
+    token([0, 0x80]), token([0, 0xff, 0xff, 0xff, 0x0f]),
+])
+def test_malformed_tokens_rejected(chart, token):
+    assert decode_history(token, chart) is None
+
+
+def test_invalid_walks_rejected(chart):
+    # a node that does not exist
+    assert decode_history(encode_history([0, len(chart)]), chart) is None
+    # a step that is no edge of the flowchart
+    node = next(node for node in range(1, len(chart)) if node not in chart.successors(0))
+    assert decode_history(encode_history([0, node]), chart) is None
+
+
+def test_overlong_history_rejected():
+    assert decode_history(token([0] * MAX_HISTORY), Complete(1)) == [0] * MAX_HISTORY
+    assert decode_history(token([0] * (MAX_HISTORY + 1)), Complete(1)) is None
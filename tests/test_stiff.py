@@ -0,0 +1,34 @@
+import numpy as np
+
+from methods import numerical, stiff
+
+
+def square(t, y):
+    return y ** 2
+
+
+def square_jacobian(t, y):
+    return 2 * y[:, :, None]
+
+
+# y' = y^2 blows up at x = 1 / y0 for y0 > 0: those trajectories fail, the others are followed to the end
+def test_blow_up_fails_only_its_own_trajectory():
+    x = np.linspace(0, 2, 201)
+    y0 = np.linspace(-2, 2, 21)[:, None]
+    with np.errstate(divide='ignore'):
+        exact = y0[:, 0] / (1 - y0[:, 0] * x[:, None])
+    blows_up = y0[:, 0] > 0.5
+    explicit = numerical.solve(square, (0, 2), y0, x)
+    for jac in (square_jacobian, None):
+        solution = stiff.solve(square, (0, 2), y0, x, jac=jac)
+        assert ((solution.status == numerical.DONE) == ~blows_up).all()
+        assert (solution.status == explicit.status).all()
+        assert np.allclose(solution.y[:, ~blows_up, 0], exact[:, ~blows_up], rtol=1e-4, atol=1e-6)
+        # the failed ones up to where they blew up
+        before = x[:, None] < 0.9 / np.maximum(y0[:, 0], 1e-9)
+        assert np.isfinite(solution.y[:, :, 0][before]).all()
+
+
+def test_all_trajectories_failing():
+    solution = stiff.solve(square, (0, 2), np.array([[1.0], [2.0]]), [0, 2])
+    assert (solution.status == numerical.FAILED).all()
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+from flowchart import classify, workers
+from flowchart.classify import EquationError
+
+
+def free_slots():
+    return workers._slots._value
+
+
+def test_call():
+    assert workers.call(pow, (2, 10), 10) == 1024
+    with pytest.raises(ZeroDivisionError):
+        workers.call(divmod, (1, 0), 10)
+    assert free_slots() == workers.MAX_WORKERS
+
+
+def test_timeout():
+    with pytest.raises(TimeoutError):
+        workers.call(time.sleep, (10,), 0.5)
+    assert free_slots() == workers.MAX_WORKERS
+
+
+# a worker that dies on its call is killed, and its slot freed
+def test_dead_worker():
+    with pytest.raises(EOFError):
+        workers.call(os._exit, (1,), 10)
+    assert free_slots() == workers.MAX_WORKERS
+    results = workers.call_all([(os._exit, (1,)), (pow, (2, 3))], 10)
+    assert isinstance(results[0], EOFError) and results[1] == 8
+    assert free_slots() == workers.MAX_WORKERS
+
+
+def test_broken_pipe(monkeypatch):
+    def submit(self, function, *args):
+        raise BrokenPipeError
+
+    monkeypatch.setattr(workers.Worker, 'submit', submit)
+    with pytest.raises(BrokenPipeError):
+        workers.call(pow, (2, 3), 10)
+    assert free_slots() == workers.MAX_WORKERS
+    with pytest.raises(BrokenPipeError):
+        workers.call_all([(pow, (2, 3))], 10)
+    assert free_slots() == workers.MAX_WORKERS
+
+
+def test_parse_safely_when_the_worker_dies(monkeypatch):
+    def die(*args):
+        raise EOFError
+
+    monkeypatch.setattr(workers, 'call', die)
+    with pytest.raises(EquationError):
+        classify.parse_safely("y' = x y")